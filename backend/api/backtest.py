@@ -0,0 +1,211 @@
+from collections import deque
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+import time
+import numpy as np
+import pandas as pd
+import pytz
+import logging
+
+from .config import TradingConfig
+from .models import BacktestTrade
+from .resample import IncrementalResampler
+from .strategy import IntegratedSMCStrategy
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayClock:
+    """Reloj de backtest: devuelve la hora de la vela que se está reproduciendo.
+
+    Las fechas de las velas son naive; `timezone` indica en qué zona están para las
+    consultas con tz (p. ej. las kill zones, que piden la hora UTC).
+    """
+
+    def __init__(self, timezone=pytz.utc):
+        self.timezone = timezone
+        self.current: Optional[datetime] = None
+
+    def __call__(self, tz=None) -> datetime:
+        if tz is None:
+            return self.current
+        return self.timezone.localize(self.current).astimezone(tz)
+
+
+class BacktestEngine:
+    """Reproduce velas de 1min una a una a través del pipeline completo de IntegratedSMCStrategy.
+
+    El estado se reutiliza entre velas: los swings de 1min salen de un StreamingSwingDetector,
+    las velas de 15min de un IncrementalResampler y las zonas premium/discount solo se
+    recalculan cuando abre una vela de 15min. Los detectores por ventana (liquidez, sweeps,
+    BOS/CHoCH, order blocks, FVGs) trabajan sobre las últimas `window` velas, así que el coste
+    por vela no crece con la longitud del histórico.
+
+    Cuando la recomendación es BUY/SELL se coloca una orden límite en la entry zone del mejor
+    nivel (borde superior para compras, inferior para ventas) con stop y objetivo fijos en pips.
+    Una orden cuyo límite ya está cruzado en la apertura de la vela se ejecuta a la apertura, y lo
+    mismo un stop o un objetivo saltados por un gap; `entry_price` es el precio de ejecución y
+    stop y objetivo se miden desde él.
+
+    Dentro de una vela no se sabe en qué orden se recorrió el rango, así que por defecto stop y
+    objetivo se comprueban a partir de la vela siguiente a la entrada. Con `exit_on_fill_bar` se
+    comprueban también en la vela de la entrada. Si una vela toca stop y objetivo (sin gap en la
+    apertura que decida cuál fue primero) se asume el stop.
+    """
+
+    def __init__(self, config: TradingConfig = None, window: int = 200, htf_minutes: int = 15, htf_window: int = 50,
+                 stop_pips: float = 10.0, take_profit_pips: float = 20.0, order_expiry_bars: int = 30,
+                 step: int = 1, data_timezone=pytz.utc, exit_on_fill_bar: bool = False):
+        self.clock = ReplayClock(data_timezone)
+        self.strategy = IntegratedSMCStrategy(api_key=None, config=config, clock=self.clock)
+        self.config = self.strategy.config
+        self.window = window
+        self.htf_minutes = htf_minutes
+        self.htf_window = htf_window
+        self.stop_pips = stop_pips
+        self.take_profit_pips = take_profit_pips
+        self.order_expiry_bars = order_expiry_bars
+        self.step = step
+        self.exit_on_fill_bar = exit_on_fill_bar
+
+    def run(self, df_1min: pd.DataFrame) -> Dict:
+        started = time.perf_counter()
+        df = df_1min.sort_values('date').reset_index(drop=True)
+        dates = pd.DatetimeIndex(df['date']).to_pydatetime()
+        opens, highs, lows, closes = (df[col].to_numpy(dtype=np.float64) for col in ('open', 'high', 'low', 'close'))
+        buckets = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64) // (self.htf_minutes * 60 * 1_000_000_000)
+
+        strategy = self.strategy
+        detector = strategy.create_swing_detector(max_swings=self.window)
+        resampler = IncrementalResampler(self.htf_minutes, max_bars=self.htf_window)
+        window_swings = deque()
+        premium_discount = strategy.calculate_premium_discount_zones({'swing_highs': [], 'swing_lows': [], 'all_swings': []})
+        trades: List[BacktestTrade] = []
+        pending, pending_bar, position, position_bar = None, 0, None, 0
+        htf_fed, analyses = 0, 0
+
+        for i in range(len(df)):
+            self.clock.current = dates[i]
+            window_swings.extend(detector.update(highs[i], lows[i], dates[i]))
+            window_start = max(i - self.window + 1, 0)
+            while window_swings and window_swings[0]['index'] < window_start:
+                window_swings.popleft()
+
+            # Primero las órdenes abiertas, con el rango de la vela actual
+            if pending is not None and position is None:
+                fill = self._fill_price(pending.entry_price, pending.action == 'BUY', opens[i], highs[i], lows[i])
+                if fill is not None:
+                    # Stop y objetivo se recolocan respecto al precio de ejecución
+                    self._set_entry(pending, fill)
+                    pending.entry_time, pending.outcome = dates[i], 'OPEN'
+                    position, position_bar, pending = pending, i, None
+                elif i - pending_bar >= self.order_expiry_bars:
+                    pending.outcome, pending = 'EXPIRED', None
+            if position is not None and (i > position_bar or self.exit_on_fill_bar):
+                # En la vela de la entrada la apertura es anterior a la ejecución: no cuenta como gap
+                bar_open = opens[i] if i > position_bar else None
+                if self._close_position(position, dates[i], bar_open, highs[i], lows[i]):
+                    position = None
+
+            # Al abrir una vela de 15min se actualiza el timeframe superior con las velas acumuladas
+            if i == 0 or buckets[i] != buckets[i - 1]:
+                htf = resampler.update(df.iloc[htf_fed:i + 1])
+                htf_fed = i + 1
+                premium_discount = strategy.calculate_premium_discount_zones(strategy.detect_swing_points_vectorized(htf))
+
+            if i + 1 < self.window or (i + 1 - self.window) % self.step or position is not None or pending is not None:
+                continue
+            analyses += 1
+            window_df = df.iloc[window_start:i + 1]
+            level, recommendation = self._analyze_bar(window_df, list(window_swings), premium_discount, closes[i])
+            if level is None or recommendation['action'] == 'HOLD':
+                continue
+            pending, pending_bar = self._place_order(level, recommendation, dates[i]), i
+            trades.append(pending)
+
+        return self._report(trades, len(df), analyses, time.perf_counter() - started)
+
+    def _analyze_bar(self, window_df: pd.DataFrame, all_swings: List[Dict], premium_discount, current_price: float):
+        strategy = self.strategy
+        swings = {'swing_highs': [s for s in all_swings if s['type'] == 'high'],
+                  'swing_lows': [s for s in all_swings if s['type'] == 'low'], 'all_swings': all_swings}
+        kill_zone = strategy.detect_kill_zones()
+        liquidity = strategy.find_liquidity_level_arrays(all_swings)
+        sweeps = strategy.detect_liquidity_sweep_arrays(window_df, liquidity['price'], liquidity['is_high'])
+        structure = strategy.detect_bos_choch_improved(window_df, swings)
+        zones = strategy.collect_zones(window_df, strategy.detect_order_block_arrays(window_df),
+                                       strategy.detect_fair_value_gap_arrays(window_df), liquidity, sweeps)
+        reaction_levels = strategy.find_reaction_levels(zones, current_price, kill_zone, premium_discount)
+        recommendation = strategy.generate_recommendation(reaction_levels, structure)
+        return (reaction_levels[0] if reaction_levels else None), recommendation
+
+    def _place_order(self, level: Dict, recommendation: Dict, signal_time: datetime) -> BacktestTrade:
+        entry = level['entry_zone_max'] if level['action'] == 'BUY' else level['entry_zone_min']
+        trade = BacktestTrade(action=level['action'], source=level['source'], confidence=recommendation['confidence'],
+                              entry_price=0.0, stop_price=0.0, target_price=0.0, signal_time=signal_time)
+        self._set_entry(trade, float(entry))
+        return trade
+
+    def _set_entry(self, trade: BacktestTrade, entry: float) -> None:
+        """Fija la entrada y coloca stop y objetivo a sus distancias en pips desde ella."""
+        offset = 1 / self.strategy.PRICE_MULTIPLIER * (1 if trade.action == 'BUY' else -1)
+        trade.entry_price = entry
+        trade.stop_price = entry - self.stop_pips * offset
+        trade.target_price = entry + self.take_profit_pips * offset
+
+    def _close_position(self, trade: BacktestTrade, bar_time: datetime, bar_open: Optional[float], high: float,
+                        low: float) -> bool:
+        is_buy = trade.action == 'BUY'
+        stop = self._fill_price(trade.stop_price, is_buy, bar_open, high, low)
+        target = self._fill_price(trade.target_price, not is_buy, bar_open, high, low)
+        target_gapped = target is not None and bar_open is not None and target == bar_open
+        if stop is not None and not target_gapped:
+            trade.exit_price, trade.outcome = stop, 'LOSS'
+        elif target is not None:
+            trade.exit_price, trade.outcome = target, 'WIN'
+        else:
+            return False
+        trade.exit_time = bar_time
+        direction = 1 if is_buy else -1
+        trade.pnl_pips = (trade.exit_price - trade.entry_price) * direction * self.strategy.PRICE_MULTIPLIER
+        return True
+
+    @staticmethod
+    def _fill_price(price: float, from_above: bool, bar_open: Optional[float], high: float, low: float) -> Optional[float]:
+        """Precio de ejecución de una orden en `price` dentro de la vela, o None si no se alcanza.
+
+        Una orden límite de compra (o el stop de una compra) se ejecuta si el precio baja hasta `price`;
+        si la vela ya abre por debajo, se ejecuta a la apertura. Sin `bar_open` se ejecuta en `price`.
+        """
+        if from_above:
+            if low > price:
+                return None
+            return float(min(bar_open, price) if bar_open is not None else price)
+        if high < price:
+            return None
+        return float(max(bar_open, price) if bar_open is not None else price)
+
+    def _report(self, trades: List[BacktestTrade], bars: int, analyses: int, elapsed: float) -> Dict:
+        closed = [t for t in trades if t.outcome in ('WIN', 'LOSS')]
+        pnl = np.array([t.pnl_pips for t in closed])
+        equity = np.cumsum(pnl)
+        drawdown = float(np.max(np.maximum.accumulate(np.append(0.0, equity)) - np.append(0.0, equity))) if len(pnl) else 0.0
+        wins = sum(1 for t in closed if t.outcome == 'WIN')
+        logger.info(f"Backtest completado: {bars} velas, {len(closed)} operaciones en {elapsed:.1f}s")
+        return {
+            'bars': bars,
+            'analyses': analyses,
+            'elapsed_seconds': elapsed,
+            'trades': len(closed),
+            'wins': wins,
+            'losses': len(closed) - wins,
+            'expired_orders': sum(1 for t in trades if t.outcome == 'EXPIRED'),
+            'open_trades': sum(1 for t in trades if t.outcome == 'OPEN'),
+            'pending_orders': sum(1 for t in trades if t.outcome == 'PENDING'),
+            'hit_rate': wins / len(closed) * 100 if closed else 0.0,
+            'total_pips': float(pnl.sum()) if len(pnl) else 0.0,
+            'average_pips': float(pnl.mean()) if len(pnl) else 0.0,
+            'max_drawdown_pips': drawdown,
+            'trade_log': [asdict(t) for t in trades],
+        }
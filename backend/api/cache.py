@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+import asyncio
+import hashlib
+import math
+import time
+
+from .metrics import CACHE_REQUESTS
+from .shared_cache import SharedCache
+
+
+def next_candle_close(now: float, candle_minutes: int = 1) -> float:
+    """Timestamp (epoch) del próximo cierre de vela de `candle_minutes` minutos."""
+    period = candle_minutes * 60
+    return (math.floor(now / period) + 1) * period
+
+
+class AnalysisCache:
+    """Caché de resultados LRU cuyas entradas caducan al cerrar la siguiente vela.
+
+    Las peticiones concurrentes con la misma clave se agrupan (single-flight): solo la primera
+    lanza el cálculo y el resto espera su resultado. El cálculo corre en su propia tarea, así que
+    si el cliente que lo lanzó se desconecta los demás siguen recibiendo el resultado. Los errores
+    no se cachean.
+
+    Con `shared` la caché local es el primer nivel de una caché compartida entre workers: antes de
+    calcular se consulta la compartida y lo calculado se publica en ella con la misma caducidad.
+    """
+
+    def __init__(self, maxsize: int = 512, candle_minutes: int = 1, name: str = 'analyze',
+                 clock: Callable[[], float] = time.time, shared: SharedCache = None):
+        self.maxsize = maxsize
+        self.candle_minutes = candle_minutes
+        self.name = name
+        self.clock = clock
+        self.shared = shared
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._inflight = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (next_candle_close(self.clock(), self.candle_minutes), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result='hit')
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_or_compute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        else:
+            CACHE_REQUESTS.inc(cache=self.name, result='coalesced')
+        return await asyncio.shield(task)
+
+    async def _load_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        if self.shared is None:
+            CACHE_REQUESTS.inc(cache=self.name, result='miss')
+            return await compute()
+        # La clave local puede no ser un str: en la compartida se usa un resumen de su repr
+        shared_key = f"{self.name}:{hashlib.sha1(repr(key).encode()).hexdigest()}"
+        value = await asyncio.to_thread(self.shared.load, shared_key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result='shared_hit')
+            return value
+        CACHE_REQUESTS.inc(cache=self.name, result='miss')
+        value = await compute()
+        await asyncio.to_thread(self.shared.store, shared_key, value, next_candle_close(self.clock(), self.candle_minutes))
+        return value
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.set(key, task.result())
@@ -0,0 +1,121 @@
+import os
+import shutil
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CandleStore:
+    """Almacén local de velas por símbolo y timeframe, en columnas .npy que se leen con memory-map.
+
+    Cada escritura crea un segmento nuevo (un directorio con un .npy por columna), que se publica
+    con un rename atómico para que otros procesos nunca vean un segmento a medias. Cuando hay
+    demasiados segmentos se compactan en uno solo, aplicando la retención de `retention_bars`.
+    """
+
+    COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, root: str, retention_bars: int = 20000, max_segments: int = 16):
+        self.root = root
+        self.retention_bars = retention_bars
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+
+    def _series_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol.upper(), timeframe)
+
+    def _segments(self, symbol: str, timeframe: str) -> List[str]:
+        path = self._series_path(symbol, timeframe)
+        if not os.path.isdir(path):
+            return []
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.startswith('seg-')]
+
+    def _load(self, symbol: str, timeframe: str) -> Optional[dict]:
+        # Un compactado concurrente puede borrar un segmento entre el listado y la lectura
+        for _ in range(3):
+            segments = self._segments(symbol, timeframe)
+            if not segments:
+                return None
+            try:
+                parts = [{col: np.load(os.path.join(segment, f'{col}.npy'), mmap_mode='r') for col in self.COLUMNS}
+                         for segment in segments]
+            except FileNotFoundError:
+                continue
+            if len(parts) == 1:
+                return parts[0]
+            columns = {col: np.concatenate([part[col] for part in parts]) for col in self.COLUMNS}
+            # Segmentos solapados: la última escritura de cada timestamp gana
+            order = np.argsort(columns['date'], kind='stable')
+            dates = columns['date'][order]
+            keep = np.append(dates[1:] != dates[:-1], True)
+            return {col: values[order][keep] for col, values in columns.items()}
+        return None
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        segments = self._segments(symbol, timeframe)
+        if not segments:
+            return None
+        try:
+            dates = np.load(os.path.join(segments[-1], 'date.npy'), mmap_mode='r')
+        except FileNotFoundError:
+            columns = self._load(symbol, timeframe)
+            dates = columns['date'] if columns else []
+        return pd.Timestamp(int(dates[-1])) if len(dates) else None
+
+    def read(self, symbol: str, timeframe: str, limit: int = None) -> pd.DataFrame:
+        columns = self._load(symbol, timeframe)
+        if columns is None:
+            return pd.DataFrame()
+        start = max(len(columns['date']) - limit, 0) if limit else 0
+        data = {col: np.array(values[start:]) for col, values in columns.items()}
+        data['date'] = data['date'].view('datetime64[ns]')
+        return pd.DataFrame(data)
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """Guarda las velas con fecha >= última almacenada (la última vela se reescribe por si estaba abierta)."""
+        if df.empty:
+            return 0
+        dates = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        last = self.last_timestamp(symbol, timeframe)
+        rows = dates >= last.value if last is not None else np.ones(len(dates), dtype=bool)
+        if not rows.any():
+            return 0
+        columns = {'date': dates[rows]}
+        columns.update({col: df[col].to_numpy()[rows] for col in self.COLUMNS[1:]})
+        with self._lock:
+            self._write_segment(symbol, timeframe, columns)
+            if len(self._segments(symbol, timeframe)) > self.max_segments:
+                self._compact(symbol, timeframe)
+        return int(rows.sum())
+
+    def compact(self, symbol: str, timeframe: str) -> None:
+        with self._lock:
+            self._compact(symbol, timeframe)
+
+    def _compact(self, symbol: str, timeframe: str) -> None:
+        segments = self._segments(symbol, timeframe)
+        columns = self._load(symbol, timeframe)
+        if columns is None:
+            return
+        start = max(len(columns['date']) - self.retention_bars, 0)
+        self._write_segment(symbol, timeframe, {col: values[start:] for col, values in columns.items()})
+        for segment in segments:
+            shutil.rmtree(segment, ignore_errors=True)
+        logger.info(f"Compactados {len(segments)} segmentos de {symbol} {timeframe}")
+
+    def _write_segment(self, symbol: str, timeframe: str, columns: dict) -> None:
+        path = self._series_path(symbol, timeframe)
+        os.makedirs(path, exist_ok=True)
+        dates = columns['date']
+        # El nombre ordena los segmentos por su primera vela y luego por orden de escritura
+        name = f"seg-{int(dates[0]):020d}-{time.time_ns():020d}"
+        tmp_path = os.path.join(path, f"tmp-{name}-{os.getpid()}")
+        os.makedirs(tmp_path)
+        for col, values in columns.items():
+            np.save(os.path.join(tmp_path, f'{col}.npy'), np.ascontiguousarray(values))
+        os.rename(tmp_path, os.path.join(path, name))
@@ -1,6 +1,7 @@
 
-from dataclasses import dataclass
-from typing import List
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+import json
 
 @dataclass
 class TradingConfig:
@@ -12,11 +13,34 @@ class TradingConfig:
     risk_per_trade: float = 0.02
     price_multiplier: int = 100000
     max_freshness_minutes: int = 120
+    # Velas recientes en las que se buscan sweeps (el bucle original revisaba las 19 últimas)
+    sweep_lookback_candles: int = 19
+    # Raíz de la API del proveedor (un servidor local en las pruebas de carga)
+    provider_base_url: str = "https://financialmodelingprep.com/api/v3"
+    candle_store_path: Optional[str] = None
+    candle_store_retention_bars: int = 20000
+    candle_store_max_segments: int = 16
     preferred_pairs: List[str] = None
     trading_sessions: List[str] = None
+    # 'fetch' pide el timeframe al proveedor; 'derive' lo construye a partir de las velas de 1min
+    timeframe_sources: Dict[str, str] = None
+    # Escáner en segundo plano: símbolos a analizar (por defecto preferred_pairs) y límites del proveedor
+    scan_universe: List[str] = None
+    provider_requests_per_minute: int = 300
+    scan_concurrency: int = 8
+    # Tabla de reglas de confluencia (None = api.scoring.DEFAULT_SCORING_RULES)
+    scoring_rules: Optional[Dict] = None
 
     def __post_init__(self):
         if self.preferred_pairs is None:
             self.preferred_pairs = ["EURUSD", "GBPUSD", "USDJPY"]
         if self.trading_sessions is None:
             self.trading_sessions = ["London", "New York"]
+        if self.timeframe_sources is None:
+            self.timeframe_sources = {"15min": "derive"}
+        if self.scan_universe is None:
+            self.scan_universe = list(self.preferred_pairs)
+
+    def cache_key(self) -> str:
+        """Representación estable de la configuración, para usarla en claves de caché."""
+        return json.dumps(asdict(self), sort_keys=True)
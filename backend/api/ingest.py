@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+    loads = json.loads
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _epoch_column(rows: List[Dict]) -> np.ndarray:
+    dates = [row['date'] for row in rows]
+    try:
+        return np.array(dates, dtype='datetime64[ns]').view(np.int64)
+    except ValueError:
+        # Formatos que NumPy no entiende (zona horaria, etc.)
+        return pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def _columns(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    columns = {'date': _epoch_column(rows)}
+    for column in PRICE_COLUMNS:
+        # np.array (y no fromiter) para que los null del proveedor lleguen como NaN
+        columns[column] = np.array([row.get(column) for row in rows], dtype=np.float64)
+    return columns
+
+
+def candles_from_json(content, limit: Optional[int] = None, since: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+    """Convierte la respuesta de historical-chart en columnas contiguas, ordenadas por fecha ascendente.
+
+    Solo se construyen columnas para las últimas `limit` velas: el proveedor las devuelve de la más
+    reciente a la más antigua, así que basta recortar la lista antes de convertir nada. Las fechas
+    quedan como datetime64[ns] sobre un array int64 de epoch. Devuelve None si el payload no es
+    una lista de velas.
+    """
+    data = loads(content) if isinstance(content, (bytes, bytearray, memoryview, str)) else content
+    if not isinstance(data, list) or len(data) == 0:
+        return None
+    newest_first = str(data[0].get('date')) > str(data[-1].get('date'))
+    rows = data if limit is None else (data[:limit] if newest_first else data[-limit:])
+    columns = _columns(rows[::-1] if newest_first else rows)
+    dates = columns['date']
+    if np.any(dates[1:] < dates[:-1]):
+        # Payload desordenado: no se puede recortar antes de ordenar
+        columns = _columns(data)
+        order = np.argsort(columns['date'], kind='stable')
+        if limit is not None:
+            order = order[-limit:]
+        columns = {name: values[order] for name, values in columns.items()}
+    if since is not None:
+        keep = columns['date'] >= np.datetime64(since, 'ns').astype(np.int64)
+        columns = {name: values[keep] for name, values in columns.items()}
+    columns['date'] = columns['date'].view('datetime64[ns]')
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,202 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import pandas as pd
+import logging
+
+from .metrics import timed_stage
+from .resample import OHLCV_COLUMNS, IncrementalResampler
+from .strategy import IntegratedSMCStrategy
+
+logger = logging.getLogger(__name__)
+
+
+class LiveSymbolState:
+    """Estado en vivo de un símbolo, actualizado con cada vela cerrada de 1min.
+
+    Igual que el backtest, reutiliza el trabajo entre velas: swings de 1min con un
+    StreamingSwingDetector y velas de 15min con un IncrementalResampler. El resto de
+    detectores trabaja sobre las últimas `window` velas.
+    """
+
+    def __init__(self, strategy: IntegratedSMCStrategy, symbol: str, window: int = 200,
+                 htf_minutes: int = 15, htf_window: int = 50):
+        self.strategy = strategy
+        self.symbol = symbol
+        self.window = window
+        self.detector = strategy.create_swing_detector(max_swings=window)
+        self.resampler = IncrementalResampler(htf_minutes, max_bars=htf_window)
+        self.swings = deque()
+        self.df = pd.DataFrame(columns=list(OHLCV_COLUMNS))
+        self.premium_discount = strategy.calculate_premium_discount_zones({'swing_highs': [], 'swing_lows': [], 'all_swings': []})
+        self.last_time: Optional[datetime] = None
+
+    def apply(self, candles: pd.DataFrame) -> int:
+        """Incorpora las velas posteriores a la última vista y devuelve cuántas eran nuevas."""
+        if candles.empty:
+            return 0
+        candles = candles.sort_values('date')
+        if self.last_time is not None:
+            candles = candles[candles['date'] > self.last_time]
+        if candles.empty:
+            return 0
+        candles = candles[list(OHLCV_COLUMNS)].reset_index(drop=True)
+        for high, low, time in zip(candles['high'].to_numpy(dtype=float), candles['low'].to_numpy(dtype=float),
+                                   pd.DatetimeIndex(candles['date']).to_pydatetime()):
+            self.swings.extend(self.detector.update(high, low, time))
+        window_start = self.detector.count - self.window
+        while self.swings and self.swings[0]['index'] < window_start:
+            self.swings.popleft()
+        self.df = pd.concat([self.df, candles], ignore_index=True) if not self.df.empty else candles
+        self.df = self.df.tail(self.window).reset_index(drop=True)
+        htf = self.resampler.update(candles)
+        self.premium_discount = self.strategy.calculate_premium_discount_zones(self.strategy.detect_swing_points_vectorized(htf))
+        self.last_time = candles['date'].iloc[-1]
+        return len(candles)
+
+    def analyze(self, current_price: Optional[float] = None) -> Dict:
+        all_swings = list(self.swings)
+        swings = {'swing_highs': [s for s in all_swings if s['type'] == 'high'],
+                  'swing_lows': [s for s in all_swings if s['type'] == 'low'], 'all_swings': all_swings}
+        if current_price is None:
+            current_price = self.df['close'].iloc[-1]
+        return self.strategy.analyze_with_swings(self.symbol, self.df, current_price, swings, self.premium_discount)
+
+
+class CandleFeed(ABC):
+    """Fuente de velas en vivo. `poll` devuelve las velas cerradas de 1min disponibles (el estado
+    descarta las ya vistas) y el precio actual; con `since=None` debe incluir el histórico inicial."""
+
+    @abstractmethod
+    async def poll(self, strategy: IntegratedSMCStrategy, symbol: str, since: Optional[datetime]) -> Tuple[pd.DataFrame, Dict]:
+        """(velas cerradas de 1min, precio actual)."""
+
+
+class ProviderCandleFeed(CandleFeed):
+    """Feed sobre el proveedor de datos, con el cliente HTTP asíncrono de la estrategia.
+
+    La primera consulta trae `history_bars` velas. Las siguientes no piden nada hasta que cierra
+    la vela posterior a `since`, y entonces solo piden las velas transcurridas desde `since`:
+    una descarga por minuto y símbolo, no una por consulta.
+    """
+
+    def __init__(self, history_bars: int = 1000):
+        self.history_bars = history_bars
+
+    async def poll(self, strategy: IntegratedSMCStrategy, symbol: str, since: Optional[datetime]) -> Tuple[pd.DataFrame, Dict]:
+        now = strategy.clock()
+        limit = self.history_bars
+        if since is not None:
+            # La vela que abre en since + 1min cierra en since + 2min
+            if now < since + timedelta(minutes=2):
+                return pd.DataFrame(), {}
+            limit = min(int((now - since) / timedelta(minutes=1)) + 1, self.history_bars)
+        candles, quote = await asyncio.gather(strategy.get_market_data_async(symbol, '1min', limit),
+                                              strategy.get_current_price_async(symbol))
+        if not candles.empty:
+            # La última vela del proveedor puede seguir abierta: solo se procesan velas cerradas
+            candles = candles[candles['date'] + timedelta(minutes=1) <= strategy.clock()]
+        return candles, quote
+
+
+class FakeCandleFeed(CandleFeed):
+    """Feed local para pruebas: sirve `history_bars` velas de `df` en la primera consulta y
+    después `batch` velas nuevas por consulta. El precio actual es el último cierre servido."""
+
+    def __init__(self, df: pd.DataFrame, history_bars: int = 200, batch: int = 1):
+        self.df = df.sort_values('date').reset_index(drop=True)
+        self.position = history_bars
+        self.batch = batch
+        self.polls = 0
+
+    async def poll(self, strategy: IntegratedSMCStrategy, symbol: str, since: Optional[datetime]) -> Tuple[pd.DataFrame, Dict]:
+        self.polls += 1
+        if since is not None:
+            self.position = min(self.position + self.batch, len(self.df))
+        served = self.df.iloc[:self.position]
+        return served, {'ticker': symbol, 'ask': float(served['close'].iloc[-1])} if not served.empty else {}
+
+
+class _Channel:
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self, payload: str) -> None:
+        self.latest = payload
+        for queue in self.subscribers:
+            # Un suscriptor lento solo necesita el último estado
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+
+class LiveHub:
+    """Un estado en vivo por (símbolo, configuración), compartido por todos sus suscriptores.
+
+    La primera suscripción arranca una tarea que consulta el feed cada `poll_interval`
+    segundos; cuando llegan velas nuevas se actualiza el estado, se recalcula el análisis una
+    sola vez y se envía (ya serializado con `encoder`) a cada suscriptor. La tarea se detiene
+    cuando se va el último suscriptor.
+    """
+
+    def __init__(self, feed: CandleFeed, encoder: Callable[[Dict], str], poll_interval: float = 5.0,
+                 window: int = 200, htf_minutes: int = 15, htf_window: int = 50):
+        self.feed = feed
+        self.poll_interval = poll_interval
+        self.encoder = encoder
+        self.state_options = {'window': window, 'htf_minutes': htf_minutes, 'htf_window': htf_window}
+        self._channels: Dict[Tuple[str, str], _Channel] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, symbol: str, strategy: IntegratedSMCStrategy) -> AsyncIterator[asyncio.Queue]:
+        key = (symbol, strategy.config.cache_key())
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel()
+            channel.task = asyncio.create_task(self._run(channel, symbol, strategy))
+        queue = asyncio.Queue(maxsize=1)
+        if channel.latest is not None:
+            queue.put_nowait(channel.latest)
+        channel.subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            channel.subscribers.discard(queue)
+            if not channel.subscribers and self._channels.get(key) is channel:
+                channel.task.cancel()
+                del self._channels[key]
+
+    def subscriber_count(self, symbol: str) -> int:
+        return sum(len(channel.subscribers) for (channel_symbol, _), channel in self._channels.items() if channel_symbol == symbol)
+
+    async def close(self) -> None:
+        channels, self._channels = list(self._channels.values()), {}
+        for channel in channels:
+            channel.task.cancel()
+        await asyncio.gather(*(channel.task for channel in channels), return_exceptions=True)
+
+    async def _run(self, channel: _Channel, symbol: str, strategy: IntegratedSMCStrategy) -> None:
+        state = LiveSymbolState(strategy, symbol, **self.state_options)
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                candles, quote = await self.feed.poll(strategy, symbol, state.last_time)
+                payload = await loop.run_in_executor(None, self._update, state, candles, quote)
+                if payload is not None:
+                    channel.publish(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error actualizando el estado en vivo de {symbol}: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _update(self, state: LiveSymbolState, candles: pd.DataFrame, quote: Dict) -> Optional[str]:
+        with timed_stage('live_update'):
+            if not state.apply(candles):
+                return None
+            return self.encoder(state.analyze(quote.get('ask')))
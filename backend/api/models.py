@@ -1,5 +1,6 @@
 
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
 @dataclass
@@ -19,3 +20,19 @@ class PremiumDiscountZones:
     range_high: Optional[float]
     range_low: Optional[float]
     current_zone: str
+
+@dataclass
+class BacktestTrade:
+    """Operación simulada en un backtest"""
+    action: str
+    source: str
+    confidence: int
+    entry_price: float
+    stop_price: float
+    target_price: float
+    signal_time: datetime
+    entry_time: Optional[datetime] = None
+    exit_time: Optional[datetime] = None
+    exit_price: Optional[float] = None
+    pnl_pips: float = 0.0
+    outcome: str = 'PENDING'
@@ -0,0 +1,283 @@
+"""Búsqueda de parámetros de TradingConfig (rejilla o aleatoria) con backtests en un pool de procesos.
+
+Las velas de cada serie se copian una sola vez a memoria compartida; las tareas solo llevan el nombre
+del bloque, así que ningún worker recibe un DataFrame serializado. Cada tarea es un backtest de una
+configuración sobre una serie, y su resultado se guarda (una línea JSON) en el fichero de resultados
+con clave (configuración, hash de los datos): una búsqueda interrumpida o ampliada retoma sin repetir
+los backtests ya hechos. Uso (desde backend/):
+    python -m api.optimizer --candles eurusd.csv gbpusd.csv --grid swing_period=3,5,8 min_confluence_score=60,70,80 \\
+        --results sweep.jsonl
+    python -m api.optimizer --synthetic trending:20000 ranging:20000 --random 64 \\
+        --space max_distance_pips=10:80 liquidity_tolerance=0.00002:0.0002 --results sweep.jsonl
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+import numpy as np
+import pandas as pd
+import logging
+
+from .backtest import BacktestEngine
+from .config import TradingConfig
+
+logger = logging.getLogger(__name__)
+
+CANDLE_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+# Parámetros numéricos de TradingConfig que admite la búsqueda
+TUNABLE_FIELDS = {field.name for field in fields(TradingConfig) if field.type in (int, float)}
+# Fin fijo de las series sintéticas: mismas velas (y mismo hash) en cada ejecución, para poder retomar
+SYNTHETIC_END = datetime(2025, 1, 6, 12, 0)
+
+
+@dataclass(frozen=True)
+class SharedCandleSet:
+    """Referencia (serializable) a una serie de velas en memoria compartida: columnas contiguas de 8 bytes."""
+    name: str
+    shm_name: str
+    rows: int
+    data_hash: str
+
+
+class SharedCandles:
+    """Publica series de velas en memoria compartida y libera los bloques al salir del `with`."""
+
+    def __init__(self):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.sets: List[SharedCandleSet] = []
+
+    def add(self, name: str, df: pd.DataFrame) -> SharedCandleSet:
+        df = df.sort_values('date').reset_index(drop=True)
+        rows = len(df)
+        block = shared_memory.SharedMemory(create=True, size=max(rows * 8 * len(CANDLE_COLUMNS), 1))
+        self._blocks.append(block)
+        columns = np.ndarray((len(CANDLE_COLUMNS), rows), dtype=np.float64, buffer=block.buf)
+        columns[0].view(np.int64)[:] = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        for row, column in enumerate(CANDLE_COLUMNS[1:], start=1):
+            columns[row] = df[column].to_numpy(dtype=np.float64)
+        candle_set = SharedCandleSet(name, block.name, rows, hashlib.sha256(columns.tobytes()).hexdigest()[:16])
+        self.sets.append(candle_set)
+        return candle_set
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+    def __enter__(self) -> 'SharedCandles':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Por proceso: series ya adjuntadas (el DataFrame se construye una vez y lo reutilizan todas las tareas)
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, pd.DataFrame]] = {}
+
+
+def _attach(candle_set: SharedCandleSet) -> pd.DataFrame:
+    entry = _attached.get(candle_set.shm_name)
+    if entry is None:
+        # Los workers comparten el resource tracker del padre, que es quien borra el bloque (unlink)
+        block = shared_memory.SharedMemory(name=candle_set.shm_name)
+        columns = np.ndarray((len(CANDLE_COLUMNS), candle_set.rows), dtype=np.float64, buffer=block.buf)
+        df = pd.DataFrame({'date': columns[0].view(np.int64).view('datetime64[ns]'),
+                           **{column: columns[row] for row, column in enumerate(CANDLE_COLUMNS[1:], start=1)}})
+        entry = _attached[candle_set.shm_name] = (block, df)
+    return entry[1]
+
+
+def run_trial(config: TradingConfig, candle_set: SharedCandleSet, engine_options: Dict) -> Dict:
+    """Backtest de una configuración sobre una serie en memoria compartida (se ejecuta en el worker)."""
+    logging.disable(logging.INFO)
+    report = BacktestEngine(config, **engine_options).run(_attach(candle_set))
+    report.pop('trade_log')
+    return report
+
+
+def trial_key(config: TradingConfig, engine_options: Dict, data_hash: str) -> str:
+    payload = json.dumps({'config': asdict(config), 'engine': engine_options, 'data': data_hash}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def grid(space: Dict[str, List]) -> List[Dict]:
+    """Todas las combinaciones de los valores de cada parámetro."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space: Dict[str, Tuple], trials: int, seed: int = 0) -> List[Dict]:
+    """`trials` combinaciones al azar: uniforme en (mínimo, máximo), entero si ambos extremos lo son."""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(trials):
+        params = {}
+        for name, (low, high) in space.items():
+            both_int = isinstance(low, int) and isinstance(high, int)
+            params[name] = rng.randint(low, high) if both_int else rng.uniform(low, high)
+        samples.append(params)
+    return samples
+
+
+class ParameterSweep:
+    """Evalúa combinaciones de parámetros sobre varias series y ordena las configuraciones por `objective`.
+
+    `engine_options` se pasa a BacktestEngine (window, step, stop_pips...). Con `results_path` cada
+    backtest terminado se añade al fichero y los ya presentes no se repiten.
+    """
+
+    def __init__(self, base_config: TradingConfig = None, results_path: Optional[str] = None,
+                 max_workers: Optional[int] = None, engine_options: Optional[Dict] = None,
+                 objective: str = 'total_pips'):
+        self.base_config = base_config or TradingConfig()
+        self.results_path = results_path
+        self.max_workers = max_workers or os.cpu_count()
+        self.engine_options = engine_options or {}
+        self.objective = objective
+
+    def _load_results(self) -> Dict[str, Dict]:
+        results = {}
+        if self.results_path and os.path.exists(self.results_path):
+            with open(self.results_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea cortada por una interrupción
+                        continue
+                    results[record['key']] = record
+        return results
+
+    def run(self, candles: Dict[str, pd.DataFrame], param_sets: Iterable[Dict]) -> List[Dict]:
+        param_sets = list(param_sets)
+        unknown = {name for params in param_sets for name in params}.difference(TUNABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Parámetros no optimizables: {', '.join(sorted(unknown))}")
+        started = time.perf_counter()
+        done = self._load_results()
+        with SharedCandles() as shared:
+            candle_sets = [shared.add(name, df) for name, df in candles.items()]
+            trials = []
+            for params in param_sets:
+                config = replace(self.base_config, **params)
+                for candle_set in candle_sets:
+                    trials.append((params, config, candle_set, trial_key(config, self.engine_options, candle_set.data_hash)))
+            pending = [trial for trial in trials if trial[3] not in done]
+            logger.info(f"Búsqueda: {len(trials)} backtests, {len(trials) - len(pending)} ya calculados")
+            if pending:
+                self._run_pending(pending, done)
+        logger.info(f"Búsqueda completada en {time.perf_counter() - started:.1f}s")
+        return self._rank(trials, done)
+
+    def _run_pending(self, pending: List[Tuple], done: Dict[str, Dict]) -> None:
+        results_file = open(self.results_path, 'a') if self.results_path else None
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(run_trial, config, candle_set, self.engine_options): (params, candle_set, key)
+                           for params, config, candle_set, key in pending}
+                for future in as_completed(futures):
+                    params, candle_set, key = futures[future]
+                    record = {'key': key, 'params': params, 'candles': candle_set.name,
+                              'data_hash': candle_set.data_hash, 'metrics': future.result()}
+                    done[key] = record
+                    if results_file is not None:
+                        results_file.write(json.dumps(record, default=str) + '\n')
+                        results_file.flush()
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+    def _rank(self, trials: List[Tuple], done: Dict[str, Dict]) -> List[Dict]:
+        by_params: Dict[str, Dict] = {}
+        for params, _, candle_set, key in trials:
+            entry = by_params.setdefault(json.dumps(params, sort_keys=True), {'params': params, 'per_candles': {}})
+            entry['per_candles'][candle_set.name] = done[key]['metrics']
+        ranking = []
+        for entry in by_params.values():
+            metrics = list(entry['per_candles'].values())
+            trades = sum(m['trades'] for m in metrics)
+            wins = sum(m['wins'] for m in metrics)
+            total_pips = sum(m['total_pips'] for m in metrics)
+            entry.update(trades=trades, wins=wins, total_pips=total_pips,
+                         hit_rate=wins / trades * 100 if trades else 0.0,
+                         average_pips=total_pips / trades if trades else 0.0,
+                         max_drawdown_pips=max(m['max_drawdown_pips'] for m in metrics))
+            ranking.append(entry)
+        return sorted(ranking, key=lambda entry: entry[self.objective], reverse=True)
+
+
+def _parse_value(text: str):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"Valor no numérico: {text}")
+
+
+def _parse_assignments(items: List[str]) -> Dict[str, str]:
+    assignments = {}
+    for item in items or []:
+        name, _, values = item.partition('=')
+        assignments[name] = values
+    return assignments
+
+
+def load_candles(path: str) -> pd.DataFrame:
+    df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    df['date'] = pd.to_datetime(df['date'])
+    return df[list(CANDLE_COLUMNS)]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Búsqueda de parámetros de TradingConfig con backtests en paralelo")
+    parser.add_argument('--candles', nargs='*', default=[], help="CSV/Parquet de velas de 1min (date, open, high, low, close, volume)")
+    parser.add_argument('--synthetic', nargs='*', default=[], help="Series sintéticas régimen:velas (p. ej. trending:20000)")
+    parser.add_argument('--grid', nargs='*', help="Rejilla: parametro=v1,v2,...")
+    parser.add_argument('--random', type=int, help="Número de combinaciones al azar sobre --space")
+    parser.add_argument('--space', nargs='*', help="Rangos de la búsqueda aleatoria: parametro=min:max")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--results', help="Fichero JSONL de resultados (permite retomar la búsqueda)")
+    parser.add_argument('--workers', type=int, help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--step', type=int, default=1, help="Analizar una de cada N velas en el backtest")
+    parser.add_argument('--objective', default='total_pips', choices=('total_pips', 'hit_rate', 'average_pips', 'trades'))
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    candles = {os.path.basename(path): load_candles(path) for path in args.candles}
+    if args.synthetic:
+        from benchmarks.synthetic import generate_ohlcv
+        for index, spec in enumerate(args.synthetic):
+            regime, _, bars = spec.partition(':')
+            candles[spec] = generate_ohlcv(int(bars or 10000), regime, seed=args.seed + index, end=SYNTHETIC_END)
+    if not candles:
+        parser.error("Indica al menos una serie con --candles o --synthetic")
+
+    if args.random:
+        space = {name: tuple(_parse_value(v) for v in values.split(':')) for name, values in _parse_assignments(args.space).items()}
+        param_sets = random_search(space, args.random, args.seed)
+    else:
+        param_sets = grid({name: [_parse_value(v) for v in values.split(',')] for name, values in _parse_assignments(args.grid).items()})
+
+    sweep = ParameterSweep(results_path=args.results, max_workers=args.workers, engine_options={'step': args.step},
+                           objective=args.objective)
+    ranking = sweep.run(candles, param_sets)
+    for entry in ranking[:args.top]:
+        print(f"{entry[args.objective]:>10.2f}  operaciones {entry['trades']:>5d}  acierto {entry['hit_rate']:5.1f}%  "
+              f"drawdown {entry['max_drawdown_pips']:8.1f}  {json.dumps(entry['params'], sort_keys=True)}")
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,102 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+import pandas as pd
+
+from .metrics import timed_stage
+from .price_index import PriceIndex
+
+# Campos del resultado de analyze_symbol, en el orden en que se devuelven
+OUTPUT_FIELDS = ('symbol', 'current_price', 'analysis_time', 'structure_1min', 'reaction_levels',
+                 'active_kill_zone', 'premium_discount_zones', 'closest_elements', 'recommendation')
+
+# Grafo del análisis: nodo -> (dependencias, etapa medida o None, cálculo sobre la estrategia y las dependencias).
+# Los nodos que no aparecen aquí son entradas que se descargan: 'symbol', 'quote' y 'frame_<timeframe>'.
+NODES: Dict[str, Tuple[Tuple[str, ...], Optional[str], Callable[..., Any]]] = {
+    'current_price': (('quote', 'frame_1min'), None,
+                      lambda s, quote, df: quote.get('ask', df.iloc[-1]['close'])),
+    'analysis_time': ((), None, lambda s: s.clock().strftime('%Y-%m-%d %H:%M:%S')),
+    'active_kill_zone': ((), None, lambda s: s.detect_kill_zones()),
+    'swings_15min': (('frame_15min',), 'swings_15min', lambda s, df: s.detect_swing_points_vectorized(df)),
+    'premium_discount_zones': (('swings_15min',), 'premium_discount',
+                               lambda s, swings: s.calculate_premium_discount_zones(swings)),
+    'swings_1min': (('frame_1min',), 'swings_1min', lambda s, df: s.detect_swing_points_vectorized(df)),
+    'liquidity': (('swings_1min',), 'liquidity_levels', lambda s, swings: s.find_liquidity_level_arrays(swings['all_swings'])),
+    'sweeps': (('frame_1min', 'liquidity'), 'liquidity_sweeps',
+               lambda s, df, liquidity: s.detect_liquidity_sweep_arrays(df, liquidity['price'], liquidity['is_high'])),
+    'structure_1min': (('frame_1min', 'swings_1min'), 'bos_choch', lambda s, df, swings: s.detect_bos_choch_improved(df, swings)),
+    'order_blocks': (('frame_1min',), 'order_blocks', lambda s, df: s.detect_order_block_arrays(df)),
+    'fair_value_gaps': (('frame_1min',), 'fair_value_gaps', lambda s, df: s.detect_fair_value_gap_arrays(df)),
+    'zones': (('frame_1min', 'order_blocks', 'fair_value_gaps', 'liquidity', 'sweeps'), 'zones',
+              lambda s, df, order_blocks, fvgs, liquidity, sweeps: s.collect_zones(df, order_blocks, fvgs, liquidity, sweeps)),
+    'zone_index': (('zones',), 'zone_index', lambda s, zone_array: PriceIndex.from_zones(zone_array)),
+    'reaction_levels': (('zones', 'current_price', 'active_kill_zone', 'premium_discount_zones', 'zone_index'), 'reaction_levels',
+                        lambda s, zone_array, price, kill_zone, pd_zones, index: s.find_reaction_levels(zone_array, price, kill_zone,
+                                                                                                          pd_zones, index)),
+    'closest_elements': (('current_price', 'zones', 'liquidity', 'sweeps', 'structure_1min', 'zone_index'), 'closest_elements',
+                         lambda s, price, zone_array, liquidity, sweeps, structure, index: s.find_closest_elements(
+                             price, zone_array, s._sweep_records(liquidity, sweeps), structure, index)),
+    'recommendation': (('reaction_levels', 'structure_1min'), None,
+                       lambda s, levels, structure: s.generate_recommendation(levels, structure)),
+}
+
+
+def normalize_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Campos pedidos en el orden de OUTPUT_FIELDS (todos si no se indica ninguno); ValueError si alguno no existe."""
+    if not fields:
+        return OUTPUT_FIELDS
+    fields = set(fields)
+    unknown = fields.difference(OUTPUT_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+    return tuple(field for field in OUTPUT_FIELDS if field in fields)
+
+
+def dependencies(fields: Iterable[str], known: Iterable[str] = ()) -> Set[str]:
+    """Nodos que hacen falta para calcular `fields`, sin recorrer más allá de los ya conocidos."""
+    known = set(known)
+    needed: Set[str] = set()
+    pending = list(fields)
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        if name not in known and name in NODES:
+            pending.extend(NODES[name][0])
+    return needed
+
+
+class AnalysisGraph:
+    """Evaluación perezosa del análisis de un símbolo: solo se calculan los nodos que piden los campos
+    solicitados, cada uno una vez por petición.
+
+    `values` trae las entradas ya descargadas (símbolo, precio, velas) y, opcionalmente, nodos ya
+    calculados por otra vía (el estado en vivo aporta los swings de 1min y las zonas premium/discount).
+    """
+
+    def __init__(self, strategy, values: Dict[str, Any]):
+        self.strategy = strategy
+        self.values = dict(values)
+
+    def evaluate(self, fields: Optional[Iterable[str]] = None) -> Dict:
+        fields = normalize_fields(fields)
+        needed = dependencies(fields, self.values)
+        missing = sorted(name for name in needed if name not in self.values and name not in NODES)
+        if missing:
+            raise KeyError(f"Entradas no disponibles: {', '.join(missing)}")
+        if any(isinstance(self.values[name], pd.DataFrame) and self.values[name].empty
+               for name in needed if name in self.values):
+            return {'error': 'No se pudieron obtener datos suficientes de todos los timeframes'}
+        return {field: self.resolve(field) for field in fields}
+
+    def resolve(self, name: str) -> Any:
+        if name in self.values:
+            return self.values[name]
+        inputs, stage, compute = NODES[name]
+        args = [self.resolve(dependency) for dependency in inputs]
+        if stage is None:
+            value = compute(self.strategy, *args)
+        else:
+            with timed_stage(stage):
+                value = compute(self.strategy, *args)
+        self.values[name] = value
+        return value
@@ -0,0 +1,81 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+class PriceIndex:
+    """Índice de niveles ordenado por precio con búsquedas binarias (np.searchsorted).
+
+    Cada nivel recibe un id consecutivo al añadirse (su fila, si el índice se construye desde un
+    ZoneArray) y opcionalmente un código de tipo. Responde "nivel más cercano (de un tipo)" y
+    "niveles a menos de N pips" en O(log n + k). Los niveles se pueden añadir por lotes sin
+    reconstruir el índice: se insertan en su posición y, a igualdad de precio, tras los anteriores,
+    así que los empates se resuelven siempre a favor del nivel añadido antes.
+    """
+
+    def __init__(self, prices=None, kinds=None):
+        self.size = 0
+        self._prices = np.empty(0)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._by_kind: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        if prices is not None:
+            self.add(prices, kinds)
+
+    @classmethod
+    def from_zones(cls, zone_array) -> 'PriceIndex':
+        """Índice sobre un ZoneArray: ids = filas y tipo = origen (order block, FVG, liquidez)."""
+        return cls(zone_array['price'], zone_array['source'])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, prices, kinds=None) -> np.ndarray:
+        """Añade niveles y devuelve los ids asignados."""
+        prices = np.atleast_1d(np.asarray(prices, dtype=np.float64))
+        kinds = np.zeros(len(prices), dtype=np.int64) if kinds is None else np.atleast_1d(np.asarray(kinds, dtype=np.int64))
+        ids = np.arange(self.size, self.size + len(prices), dtype=np.int64)
+        self.size += len(prices)
+        self._prices, self._ids = self._merge(self._prices, self._ids, prices, ids)
+        for kind in np.unique(kinds):
+            mask = kinds == kind
+            kind_prices, kind_ids = self._by_kind.get(int(kind), (np.empty(0), np.empty(0, dtype=np.int64)))
+            self._by_kind[int(kind)] = self._merge(kind_prices, kind_ids, prices[mask], ids[mask])
+        return ids
+
+    @staticmethod
+    def _merge(prices: np.ndarray, ids: np.ndarray, new_prices: np.ndarray, new_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(new_prices, kind='stable')
+        new_prices, new_ids = new_prices[order], new_ids[order]
+        # side='right': los ids nuevos quedan detrás de los ya indexados con el mismo precio
+        positions = np.searchsorted(prices, new_prices, side='right')
+        return np.insert(prices, positions, new_prices), np.insert(ids, positions, new_ids)
+
+    def _arrays(self, kind: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        if kind is None:
+            return self._prices, self._ids
+        return self._by_kind.get(int(kind), (np.empty(0), np.empty(0, dtype=np.int64)))
+
+    def nearest(self, price: float, kind: Optional[int] = None) -> Optional[int]:
+        """Id del nivel más cercano a `price` (el más antiguo si hay empate), o None si no hay niveles."""
+        prices, ids = self._arrays(kind)
+        if not len(prices):
+            return None
+        position = int(np.searchsorted(prices, price, side='left'))
+        candidates = []
+        if position < len(prices):
+            candidates.append(position)
+        if position > 0:
+            # Primer nivel con el precio del vecino inferior (el de id más bajo entre los iguales)
+            candidates.append(int(np.searchsorted(prices, prices[position - 1], side='left')))
+        best = min(candidates, key=lambda i: (abs(prices[i] - price), ids[i]))
+        return int(ids[best])
+
+    def within(self, price: float, max_pips: float, price_multiplier: float, kind: Optional[int] = None) -> np.ndarray:
+        """Ids (ordenados) de los niveles con abs(nivel - price) * price_multiplier <= max_pips."""
+        prices, ids = self._arrays(kind)
+        # Rango un poco más ancho con búsqueda binaria y después la condición exacta sobre ese tramo
+        margin = max_pips / price_multiplier * (1 + 1e-9) + 1e-12
+        start = np.searchsorted(prices, price - margin, side='left')
+        stop = np.searchsorted(prices, price + margin, side='right')
+        window = slice(start, stop)
+        inside = np.abs(prices[window] - price) * price_multiplier <= max_pips
+        return np.sort(ids[window][inside])
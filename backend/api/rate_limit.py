@@ -0,0 +1,87 @@
+from typing import Optional
+import asyncio
+import math
+import threading
+import time
+import logging
+
+from .shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket: como mucho `rate_per_minute` peticiones por minuto, con ráfagas de `burst`.
+
+    Cada llamada reserva sus tokens bajo el lock y espera fuera de él lo que falte, así que sirve
+    igual a los hilos (`acquire`) que al bucle de eventos (`acquire_async`). Solo limita al proceso
+    que lo crea; para repartir el límite entre workers está SharedRateLimiter.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = burst if burst is not None else max(rate_per_minute / 6, 1)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Reserva `tokens` y devuelve los segundos que hay que esperar antes de usarlos."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate) - tokens
+            self._updated = now
+            return max(-self.tokens / self.rate, 0.0)
+
+    def acquire(self, tokens: float = 1) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class SharedRateLimiter(RateLimiter):
+    """Límite común a todos los workers, con un contador por ventana de `window_seconds` en la caché compartida.
+
+    Cada ventana admite la parte proporcional del límite por minuto. Una petición que no cabe en la
+    ventana actual se apunta en la siguiente con hueco y espera a que empiece. Si la caché falla no
+    se limita: un fallo de la caché nunca bloquea las descargas.
+    """
+
+    def __init__(self, shared: SharedCache, rate_per_minute: float, window_seconds: float = 10.0, name: str = 'provider'):
+        self.shared = shared
+        self.window_seconds = window_seconds
+        self.per_window = max(int(rate_per_minute * window_seconds / 60), 1)
+        self.name = name
+
+    def reserve(self, tokens: float = 1) -> float:
+        now = time.time()
+        window = math.floor(now / self.window_seconds)
+        amount = math.ceil(tokens)
+        try:
+            while self.shared.incr(f"ratelimit:{self.name}:{window}", amount,
+                                   (window + 2) * self.window_seconds) > max(self.per_window, amount):
+                window += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Límite de peticiones compartido no disponible: {str(e)}")
+            return 0.0
+        return max(window * self.window_seconds - now, 0.0)
+
+    async def acquire_async(self, tokens: float = 1) -> None:
+        # El contador vive en la caché compartida (E/S bloqueante): fuera del bucle de eventos
+        wait = await asyncio.to_thread(self.reserve, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def create_rate_limiter(rate_per_minute: float, shared: Optional[SharedCache] = None) -> Optional[RateLimiter]:
+    """Limitador de las peticiones al proveedor: compartido si hay caché compartida, del proceso si no; None si rate <= 0."""
+    if rate_per_minute <= 0:
+        return None
+    if shared is not None:
+        return SharedRateLimiter(shared, rate_per_minute)
+    return RateLimiter(rate_per_minute)
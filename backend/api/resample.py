@@ -0,0 +1,62 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+
+def resample_ohlcv(df: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """Construye velas de `minutes` minutos a partir de velas de 1min ordenadas por fecha.
+
+    Los buckets se alinean al reloj (00, 05, 10... para 5min) y se etiquetan con su hora de
+    apertura, igual que las velas del proveedor. El último bucket puede estar incompleto.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=list(OHLCV_COLUMNS))
+    dates = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    bucket_ns = minutes * 60 * 1_000_000_000
+    buckets = dates // bucket_ns
+    starts = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1]))
+    ends = np.append(starts[1:], len(dates)) - 1
+    return pd.DataFrame({
+        'date': (buckets[starts] * bucket_ns).view('datetime64[ns]'),
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(), starts),
+    })
+
+
+class IncrementalResampler:
+    """Mantiene un timeframe superior actualizado a medida que llegan velas nuevas de 1min.
+
+    Solo se recalcula el bucket abierto (y los nuevos): las velas de 1min del bucket en curso
+    se guardan hasta que se cierra, y una vela de 1min repetida sustituye a la anterior.
+    """
+
+    def __init__(self, minutes: int, max_bars: Optional[int] = None):
+        self.minutes = minutes
+        self.max_bars = max_bars
+        self.bars = pd.DataFrame(columns=list(OHLCV_COLUMNS))
+        self._open_bucket = pd.DataFrame(columns=list(OHLCV_COLUMNS))
+
+    def update(self, df_1min: pd.DataFrame) -> pd.DataFrame:
+        if df_1min.empty:
+            return self.bars
+        new_rows = df_1min[list(OHLCV_COLUMNS)]
+        if not self._open_bucket.empty:
+            new_rows = new_rows[new_rows['date'] >= self._open_bucket['date'].iloc[0]]
+            if new_rows.empty:
+                return self.bars
+            pending = self._open_bucket[self._open_bucket['date'] < new_rows['date'].iloc[0]]
+            new_rows = pd.concat([pending, new_rows], ignore_index=True)
+        resampled = resample_ohlcv(new_rows, self.minutes)
+        if not self.bars.empty:
+            self.bars = self.bars[self.bars['date'] < resampled['date'].iloc[0]]
+        self.bars = pd.concat([self.bars, resampled], ignore_index=True) if not self.bars.empty else resampled
+        if self.max_bars is not None:
+            self.bars = self.bars.tail(self.max_bars).reset_index(drop=True)
+        last_bucket_start = resampled['date'].iloc[-1]
+        self._open_bucket = new_rows[new_rows['date'] >= last_bucket_start].reset_index(drop=True)
+        return self.bars
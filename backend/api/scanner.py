@@ -0,0 +1,160 @@
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import os
+import socket
+import time
+import logging
+
+from .cache import next_candle_close
+from .metrics import observe_stages, timed_stage
+from .shared_cache import SharedCache
+from .strategy import IntegratedSMCStrategy, analyze_market_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ScanStore:
+    """Últimos análisis del escáner y su ranking, precalculado al publicar para que leerlo sea O(1).
+
+    Con `shared` el ranking se publica en la caché compartida: cualquier worker lo sirve aunque
+    el escaneo lo haya hecho otro, y el que escanea parte de las entradas publicadas por los demás.
+    """
+
+    SHARED_KEY = 'scan:ranking'
+    SHARED_TTL_SECONDS = 24 * 3600
+
+    def __init__(self, shared: SharedCache = None):
+        self.shared = shared
+        self.entries: Dict[str, Dict] = {}
+        self.ranking: List[Dict] = []
+        self.updated_at: Optional[str] = None
+
+    def update(self, entries: List[Dict]) -> None:
+        self._load_shared()
+        for entry in entries:
+            self.entries[entry['symbol']] = entry
+        self.ranking = sorted(self.entries.values(), key=lambda e: (-e['best_confidence'], e['symbol']))
+        self.updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if self.shared is not None:
+            self.shared.store(self.SHARED_KEY, {'entries': self.entries, 'ranking': self.ranking, 'updated_at': self.updated_at},
+                              time.time() + self.SHARED_TTL_SECONDS)
+
+    def snapshot(self, limit: Optional[int] = None) -> Dict:
+        self._load_shared()
+        ranking = self.ranking if limit is None else self.ranking[:limit]
+        return {'updated_at': self.updated_at, 'symbols': len(self.entries), 'ranking': ranking}
+
+    def _load_shared(self) -> None:
+        # Sin publicación compartida (o si la caché falla) se sirve la copia local
+        published = self.shared.load(self.SHARED_KEY) if self.shared is not None else None
+        if published is not None:
+            self.entries, self.ranking, self.updated_at = published['entries'], published['ranking'], published['updated_at']
+
+
+def summarize_result(result: Dict) -> Dict:
+    """Entrada del ranking a partir de un resultado de analyze_snapshot."""
+    levels = result['reaction_levels']
+    return {
+        'symbol': result['symbol'],
+        'best_confidence': int(levels[0]['confidence']) if levels else 0,
+        'best_level': levels[0] if levels else None,
+        'reaction_levels': len(levels),
+        'recommendation': result['recommendation'],
+        'current_price': float(result['current_price']),
+        'analysis_time': result['analysis_time'],
+    }
+
+
+class MarketScanner:
+    """Analiza un universo de símbolos al cierre de cada vela y publica el ranking en un ScanStore.
+
+    Las descargas pasan por el limitador de peticiones de la estrategia (el mismo que usan los
+    endpoints) y como mucho `concurrency` símbolos se analizan a la vez. Los detectores se ejecutan
+    en `executor` (el pool de procesos de la app; con None, en el executor por defecto). Un
+    símbolo que falla conserva su entrada anterior.
+
+    Con `shared_cache` cada worker arranca su escáner, pero en cada vela solo escanea el primero
+    que reserva el ciclo en la caché compartida; si ese worker cae, la vela siguiente la toma otro.
+    """
+
+    def __init__(self, strategy: IntegratedSMCStrategy, store: ScanStore, universe: List[str] = None,
+                 executor: Optional[Executor] = None, shared_cache: SharedCache = None,
+                 candle_minutes: int = 1, settle_seconds: float = 2.0):
+        config = strategy.config
+        self.strategy = strategy
+        self.store = store
+        self.universe = list(dict.fromkeys(s.upper() for s in (universe or config.scan_universe)))
+        self.executor = executor
+        self.shared_cache = shared_cache
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = config.scan_concurrency
+        self.candle_minutes = candle_minutes
+        # Margen tras el cierre para que el proveedor publique la vela
+        self.settle_seconds = settle_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.claim_cycle():
+                    await self.scan_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error en el ciclo del escáner: {str(e)}")
+            now = time.time()
+            await asyncio.sleep(next_candle_close(now, self.candle_minutes) - now + self.settle_seconds)
+
+    async def claim_cycle(self, now: Optional[float] = None) -> bool:
+        """Reserva el escaneo de la vela en curso; False si ya lo reservó otro worker."""
+        if self.shared_cache is None:
+            return True
+        cycle_end = next_candle_close(time.time() if now is None else now, self.candle_minutes)
+        try:
+            return await asyncio.to_thread(self.shared_cache.add, f"scan:cycle:{int(cycle_end)}", self.owner.encode(),
+                                           cycle_end + self.settle_seconds)
+        except Exception as e:
+            # Sin caché no hay reparto posible: mejor escanear de más que dejar el ranking sin actualizar
+            logger.warning(f"⚠️ No se pudo reservar el ciclo del escáner: {str(e)}")
+            return True
+
+    async def scan_once(self) -> int:
+        """Analiza todo el universo una vez y devuelve cuántos símbolos se actualizaron."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        async def scan_symbol(symbol: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await self._analyze(symbol)
+                except Exception as e:
+                    logger.error(f"❌ Error escaneando {symbol}: {str(e)}")
+                    return None
+
+        with timed_stage('scan_cycle'):
+            entries = [entry for entry in await asyncio.gather(*(scan_symbol(s) for s in self.universe)) if entry]
+            await asyncio.to_thread(self.store.update, entries)
+        logger.info(f"Escaneo completado: {len(entries)}/{len(self.universe)} símbolos en {time.perf_counter() - started:.1f}s")
+        return len(entries)
+
+    async def _analyze(self, symbol: str) -> Optional[Dict]:
+        snapshot = await self.strategy.fetch_market_snapshot_async(symbol)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, analyze_market_snapshot, self.strategy.config, symbol, snapshot)
+        observe_stages(result.pop('debug')['stages_ms'])
+        if 'error' in result:
+            logger.warning(f"⚠️ {symbol} sin datos suficientes en el escaneo: {result['error']}")
+            return None
+        return summarize_result(result)
@@ -0,0 +1,77 @@
+from typing import Dict, Optional
+import numpy as np
+
+from . import zones
+
+# Reglas de confluencia como datos. Cada escala suma los puntos del primer escalón que cumple
+# el nivel (los escalones van del más exigente al menos exigente) y el total se recorta a `max`.
+DEFAULT_SCORING_RULES = {
+    'base': 40,
+    'max': 100,
+    # Kill zone activa según su prioridad
+    'kill_zone': {'high': 30, 'medium': 20},
+    # Compra en zona discount o venta en zona premium
+    'premium_discount': 25,
+    # Order block o FVG validado por un sweep (los niveles de liquidez no suman)
+    'swept_zone': 10,
+    'tiers': [
+        {'field': 'touches', 'op': '>=', 'steps': [[3, 20], [2, 10]]},
+        {'field': 'freshness', 'op': '<=', 'steps': [[15, 15], [30, 10], [60, 5]]},
+        {'field': 'strength', 'op': '>=', 'steps': [[80, 10], [60, 7], [40, 5]]},
+    ],
+}
+
+UNKNOWN_CODE = 255
+TYPE_CODES = {name: code for code, name in enumerate(zones.TYPE_NAMES)}
+SOURCE_CODES = {name: code for code, name in enumerate(zones.SOURCE_NAMES)}
+_COMPARISONS = {'>=': np.greater_equal, '<=': np.less_equal, '>': np.greater, '<': np.less}
+
+
+class ConfluenceScorer:
+    """Puntuación de confluencia de muchos niveles a la vez, con máscaras sobre sus columnas.
+
+    Las columnas son `type` y `source` (códigos de api.zones), `touches`, `freshness`,
+    `strength` e `is_swept`. El contexto es el mismo que el de calculate_confluence_score:
+    kill zone, zonas premium/discount y precio actual, comunes a todos los niveles.
+    """
+
+    def __init__(self, rules: Optional[Dict] = None):
+        self.rules = rules or DEFAULT_SCORING_RULES
+        self._tiers = [(tier['field'], _COMPARISONS[tier['op']],
+                        [threshold for threshold, _ in tier['steps']], [points for _, points in tier['steps']])
+                       for tier in self.rules['tiers']]
+
+    def score(self, columns: Dict[str, np.ndarray], context: Dict) -> np.ndarray:
+        types = np.asarray(columns['type'])
+        score = np.full(len(types), self.rules['base'], dtype=np.int64)
+        score += self._context_bonus(types, context)
+        for field, compare, thresholds, points in self._tiers:
+            values = np.asarray(columns[field], dtype=np.float64)
+            score += np.select([compare(values, threshold) for threshold in thresholds], points, 0)
+        swept_zone = np.asarray(columns['is_swept'], dtype=bool) & (np.asarray(columns['source']) != zones.LIQUIDITY)
+        score += np.where(swept_zone, self.rules['swept_zone'], 0)
+        return np.minimum(score, self.rules['max'])
+
+    def score_zones(self, zone_array, context: Dict) -> np.ndarray:
+        data = zone_array.data
+        return self.score({'type': data['type'], 'source': data['source'], 'touches': data['touches'],
+                           'freshness': data['freshness'], 'strength': data['strength'], 'is_swept': data['is_swept']},
+                          context)
+
+    def _context_bonus(self, types: np.ndarray, context: Dict):
+        bonus = 0
+        kill_zone = context.get('kill_zone')
+        if kill_zone and kill_zone.is_active:
+            bonus += self.rules['kill_zone'].get(kill_zone.priority, 0)
+        pd_zones = context.get('premium_discount_zones')
+        if not (pd_zones and pd_zones.equilibrium):
+            return bonus
+        current_price = context.get('current_price', 0)
+        is_bullish_buy = (types == zones.BULLISH) | (types == zones.LOW)
+        is_bearish_sell = (types == zones.BEARISH) | (types == zones.HIGH)
+        favourable = np.zeros(len(types), dtype=bool)
+        if current_price <= pd_zones.discount_end:
+            favourable |= is_bullish_buy
+        if current_price >= pd_zones.premium_start:
+            favourable |= is_bearish_sell
+        return bonus + np.where(favourable, self.rules['premium_discount'], 0)
@@ -0,0 +1,190 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache(ABC):
+    """Caché compartida entre workers (clave -> bytes con fecha de caducidad en epoch).
+
+    `load`/`store` guardan objetos en binario con pickle: los DataFrames de velas y los resultados
+    se recuperan sin volver a parsear JSON. Como pickle ejecuta código al cargar, el almacén debe
+    ser privado del despliegue (el mismo nivel de confianza que la propia app). Un fallo de la
+    caché nunca rompe la petición: se registra y se trata como un miss.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Valor guardado o None si no existe o ya caducó."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        """Guarda `value` hasta `expires_at` (epoch en segundos)."""
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, expires_at: float) -> bool:
+        """Guarda `value` solo si la clave no existe (o caducó), de forma atómica; True si la guardó."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int, expires_at: float) -> int:
+        """Suma `amount` al contador `key` de forma atómica y devuelve el total. Un contador que no
+        existe (o caducó) empieza en 0 y caduca en `expires_at`; se lee con incr, no con get."""
+
+    def load(self, key: str) -> Any:
+        try:
+            data = self.get(key)
+            return pickle.loads(data) if data is not None else None
+        except Exception as e:
+            logger.warning(f"⚠️ Error leyendo la caché compartida ({key}): {str(e)}")
+            return None
+
+    def store(self, key: str, value: Any, expires_at: float) -> None:
+        try:
+            self.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at)
+        except Exception as e:
+            logger.warning(f"⚠️ Error escribiendo en la caché compartida ({key}): {str(e)}")
+
+
+class MemoryCache(SharedCache):
+    """Implementación en memoria del proceso, para un solo worker y para pruebas."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+
+    def add(self, key: str, value: bytes, expires_at: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return False
+            self._entries[key] = (value, expires_at)
+            return True
+
+    def incr(self, key: str, amount: int, expires_at: float) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                entry = (0, expires_at)
+            self._entries[key] = (entry[0] + amount, entry[1])
+            return self._entries[key][0]
+
+
+class SQLiteCache(SharedCache):
+    """Caché en un fichero SQLite (modo WAL) compartido por todos los workers del mismo host."""
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo y proceso: sqlite3 no permite compartirlas entre hilos ni tras un fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute("SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        connection = self._connection()
+        connection.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+        self._purge(connection)
+
+    def add(self, key: str, value: bytes, expires_at: float) -> bool:
+        # Una sola sentencia: inserta o sustituye una entrada caducada; con una vigente no cambia ninguna fila
+        connection = self._connection()
+        cursor = connection.execute("INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+                                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                                    "WHERE cache.expires_at <= ?", (key, value, expires_at, time.time()))
+        self._purge(connection)
+        return cursor.rowcount == 1
+
+    def incr(self, key: str, amount: int, expires_at: float) -> int:
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute("INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+                                 "ON CONFLICT (key) DO UPDATE SET "
+                                 "value = CASE WHEN cache.expires_at > ? THEN cache.value + excluded.value ELSE excluded.value END, "
+                                 "expires_at = CASE WHEN cache.expires_at > ? THEN cache.expires_at ELSE excluded.expires_at END "
+                                 "RETURNING value", (key, amount, expires_at, now, now)).fetchone()
+        self._purge(connection)
+        return int(row[0])
+
+    def _purge(self, connection: sqlite3.Connection) -> None:
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+
+class RedisCache(SharedCache):
+    """Caché sobre Redis (o un servidor compatible); la caducidad la aplica el propio servidor."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("El backend redis:// de la caché compartida necesita el paquete 'redis'") from e
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        self.client.set(key, value, pxat=int(expires_at * 1000))
+
+    def add(self, key: str, value: bytes, expires_at: float) -> bool:
+        return bool(self.client.set(key, value, nx=True, pxat=int(expires_at * 1000)))
+
+    def incr(self, key: str, amount: int, expires_at: float) -> int:
+        # SET NX fija la caducidad solo al crear el contador; INCRBY conserva la que tenga
+        pipeline = self.client.pipeline()
+        pipeline.set(key, 0, nx=True, pxat=int(expires_at * 1000))
+        pipeline.incrby(key, amount)
+        return int(pipeline.execute()[1])
+
+
+def create_shared_cache(url: Optional[str]) -> Optional[SharedCache]:
+    """Crea el backend a partir de una URL: sqlite:///ruta, redis://..., memory:// o none."""
+    if not url or url == 'none':
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url)
+    if url == 'memory://':
+        return MemoryCache()
+    raise ValueError(f"Backend de caché compartida no soportado: {url}")
@@ -1,50 +1,244 @@
 
 import requests
-import json
+import httpx
+import asyncio
+import bisect
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Awaitable, Callable, Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import pytz
+import time
 import warnings
 from .config import TradingConfig
 from .models import KillZoneInfo, PremiumDiscountZones
-from .utils import validate_dataframe
+from .swings import StreamingSwingDetector
+from .utils import validate_dataframe, timeframe_to_minutes
+from .candle_store import CandleStore
+from .cache import next_candle_close
+from .shared_cache import SharedCache
+from .rate_limit import RateLimiter
+from . import zones
+from .zones import ZoneArray
+from .price_index import PriceIndex
+from . import scoring
+from .scoring import ConfluenceScorer
+from .ingest import candles_from_json
+from .pipeline import AnalysisGraph, dependencies, normalize_fields
+from .resample import resample_ohlcv
+from .metrics import CACHE_REQUESTS, collect_stages, timed_stage
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 warnings.filterwarnings('ignore')
 
+def _numeric_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Columna como float64; los valores no numéricos quedan como NaN y no cumplen ninguna condición."""
+    values = df[column].to_numpy()
+    if values.dtype.kind in 'fiu':
+        return values.astype(np.float64, copy=False)
+    return pd.to_numeric(values, errors='coerce').astype(np.float64)
+
+def _cluster_labels(values: np.ndarray, tolerance: float) -> np.ndarray:
+    """Cluster de cada valor, en orden de llegada, con la agrupación original de niveles de liquidez.
+
+    Cada valor se une al primer cluster creado cuya clave (el valor que lo creó) esté a menos de
+    `tolerance`, o crea uno nuevo. Las claves quedan separadas al menos `tolerance` entre sí, así que
+    solo las vecinas en la lista ordenada de claves pueden coincidir: una búsqueda binaria por valor.
+    Los ids de cluster siguen el orden de creación.
+    """
+    keys: List[float] = []
+    key_ids: List[int] = []
+    labels = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values.tolist()):
+        position = bisect.bisect_left(keys, value)
+        matches = [key_ids[j] for j in range(max(position - 1, 0), min(position + 1, len(keys)))
+                   if abs(value - keys[j]) < tolerance]
+        if matches:
+            labels[i] = min(matches)
+        else:
+            labels[i] = len(key_ids)
+            keys.insert(position, value)
+            key_ids.insert(position, len(key_ids))
+    return labels
+
+def _run_timed(stage: str, func: Callable, *args):
+    with timed_stage(stage):
+        return func(*args)
+
+async def _run_timed_async(stage: str, awaitable: Awaitable):
+    with timed_stage(stage):
+        return await awaitable
+
+def _stage_breakdown(stages: Dict[str, float]) -> Dict:
+    return {'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in stages.items()}}
+
+def _epoch_ns(df: pd.DataFrame) -> np.ndarray:
+    """Fechas de las velas como enteros epoch (ns); sin copia si la columna ya es datetime64[ns]."""
+    dates = df['date'].to_numpy()
+    if dates.dtype != np.dtype('datetime64[ns]'):
+        dates = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+    return dates.view(np.int64)
+
+def _minutes_since(current_time: datetime, epoch_ns: np.ndarray) -> np.ndarray:
+    """Minutos transcurridos desde cada fecha (epoch en ns) hasta current_time, sobre el array completo."""
+    return (np.datetime64(current_time, 'ns').astype(np.int64) - epoch_ns) / 1e9 / 60
+
 class IntegratedSMCStrategy:
-    def __init__(self, api_key: str, config: TradingConfig = None):
+    # Timeframes (y número de velas) que puede necesitar analyze_symbol.
+    MARKET_DATA_REQUESTS = (('1min', 200), ('15min', 50))
+
+    def __init__(self, api_key: str, config: TradingConfig = None, clock: Callable[..., datetime] = None,
+                 http_client: httpx.AsyncClient = None, shared_cache: SharedCache = None, rate_limiter: RateLimiter = None):
         self.api_key = api_key
         self.config = config or TradingConfig()
+        # Reloj inyectable (misma firma que datetime.now) para frescura y kill zones; los backtests lo sustituyen
+        self.clock = clock or datetime.now
         self.session = requests.Session()
         self.session.trust_env = False
+        # Cliente asíncrono compartido (pool de conexiones con keep-alive) para las variantes *_async
+        self.http_client = http_client
+        # Caché compartida entre workers para las velas descargadas (sin almacén local)
+        self.shared_cache = shared_cache
+        # Límite de peticiones al proveedor común a todas las descargas (None = sin límite)
+        self.rate_limiter = rate_limiter
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         self.PRICE_MULTIPLIER = self.config.price_multiplier
+        self.scorer = ConfluenceScorer(self.config.scoring_rules)
+        self.candle_store = None
+        if self.config.candle_store_path:
+            self.candle_store = CandleStore(self.config.candle_store_path, self.config.candle_store_retention_bars,
+                                            self.config.candle_store_max_segments)
         logger.info("Estrategia SMC/ICT inicializada.")
 
     def get_market_data(self, symbol: str, timeframe: str = "1min", limit: int = 200) -> pd.DataFrame:
-        url = f"https://financialmodelingprep.com/api/v3/historical-chart/{timeframe}/{symbol}?apikey={self.api_key}"
+        if self.candle_store is not None:
+            return self._get_stored_market_data(symbol, timeframe, limit)
+        key = self._frame_key(symbol, timeframe, limit)
+        df = self._load_frame(key)
+        if df is None:
+            df = self._validated_tail(self._download_market_data(symbol, timeframe, limit=limit), limit)
+            self._store_frame(key, df)
+        return df
+
+    async def get_market_data_async(self, symbol: str, timeframe: str = "1min", limit: int = 200) -> pd.DataFrame:
+        if self.candle_store is not None:
+            # El almacén lee y escribe ficheros: fuera del bucle de eventos
+            refresh, since = await asyncio.to_thread(self._store_refresh, symbol, timeframe)
+            if refresh:
+                df = await self._download_market_data_async(symbol, timeframe, since)
+                await asyncio.to_thread(self._store_update, symbol, timeframe, since, df)
+            return await asyncio.to_thread(self._read_store, symbol, timeframe, limit)
+        key = self._frame_key(symbol, timeframe, limit)
+        df = await asyncio.to_thread(self._load_frame, key) if self.shared_cache is not None else None
+        if df is None:
+            df = self._validated_tail(await self._download_market_data_async(symbol, timeframe, limit=limit), limit)
+            if self.shared_cache is not None:
+                await asyncio.to_thread(self._store_frame, key, df)
+        return df
+
+    @staticmethod
+    def _frame_key(symbol: str, timeframe: str, limit: int) -> str:
+        return f"candles:{symbol}:{timeframe}:{limit}"
+
+    def _load_frame(self, key: str) -> Optional[pd.DataFrame]:
+        if self.shared_cache is None:
+            return None
+        df = self.shared_cache.load(key)
+        CACHE_REQUESTS.inc(cache='candles', result='shared_hit' if df is not None else 'miss')
+        return df
+
+    def _store_frame(self, key: str, df: pd.DataFrame) -> None:
+        # La última vela de cualquier timeframe sigue formándose: todas caducan al cierre del minuto
+        if self.shared_cache is not None and not df.empty:
+            self.shared_cache.store(key, df, next_candle_close(time.time()))
+
+    @staticmethod
+    def _validated_tail(df: pd.DataFrame, limit: int) -> pd.DataFrame:
+        if df.empty:
+            return df
+        if not validate_dataframe(df):
+            logger.error("Datos de mercado inválidos tras la obtención.")
+            return pd.DataFrame()
+        return df.tail(limit).reset_index(drop=True)
+
+    def _get_stored_market_data(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        """Sirve las velas del almacén local y solo descarga las posteriores a la última guardada."""
+        refresh, since = self._store_refresh(symbol, timeframe)
+        if refresh:
+            self._store_update(symbol, timeframe, since, self._download_market_data(symbol, timeframe, since))
+        return self._read_store(symbol, timeframe, limit)
+
+    def _store_refresh(self, symbol: str, timeframe: str) -> Tuple[bool, Optional[datetime]]:
+        """(hay que descargar, desde cuándo): todo si el almacén está vacío, el delta si ya cerró una vela nueva."""
+        last_stored = self.candle_store.last_timestamp(symbol, timeframe)
+        if last_stored is None:
+            return True, None
+        return self.clock() - last_stored >= timedelta(minutes=timeframe_to_minutes(timeframe)), last_stored
+
+    def _store_update(self, symbol: str, timeframe: str, since: Optional[datetime], df: pd.DataFrame) -> None:
+        if since is not None and df.empty:
+            logger.warning(f"⚠️ Sirviendo velas almacenadas de {symbol} en {timeframe} sin actualizar")
+        self.candle_store.append(symbol, timeframe, df)
+
+    def _read_store(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        df = self.candle_store.read(symbol, timeframe, limit)
+        if not validate_dataframe(df):
+            logger.error("Datos de mercado inválidos tras la obtención.")
+            return pd.DataFrame()
+        return df
+
+    # La API key va en `params` y no en la URL: así no aparece en los logs ni en los mensajes de error
+    def _market_data_url(self, symbol: str, timeframe: str) -> str:
+        return f"{self.config.provider_base_url}/historical-chart/{timeframe}/{symbol}"
+
+    def _market_data_params(self, since: datetime = None) -> Dict[str, str]:
+        params = {'apikey': self.api_key}
+        if since is not None:
+            params['from'] = since.strftime('%Y-%m-%d')
+        return params
+
+    def _quote_url(self, symbol: str) -> str:
+        return f"{self.config.provider_base_url}/fx/{symbol}"
+
+    def _redact(self, error: Exception) -> str:
+        # Los errores de requests/httpx incluyen la URL completa, con la API key entre los parámetros
+        message = str(error)
+        return message.replace(self.api_key, '***') if self.api_key else message
+
+    @staticmethod
+    def _parse_market_data(content: bytes, symbol: str, timeframe: str, since: datetime = None,
+                           limit: int = None) -> pd.DataFrame:
+        with timed_stage(f'parse_{timeframe}'):
+            df = candles_from_json(content, limit, since)
+        if df is None:
+            logger.error(f"❌ No se obtuvieron datos válidos para {symbol} en {timeframe}")
+            return pd.DataFrame()
+        return df
+
+    @staticmethod
+    def _parse_quote(data, symbol: str) -> Dict:
+        if isinstance(data, list) and len(data) > 0:
+            return data[0]
+        elif isinstance(data, dict):
+            return data
+        logger.error(f"❌ No se obtuvieron datos de precio válidos para {symbol}")
+        return {}
+
+    def _download_market_data(self, symbol: str, timeframe: str, since: datetime = None, limit: int = None) -> pd.DataFrame:
         try:
-            response = self.session.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            if not isinstance(data, list) or len(data) == 0:
-                logger.error(f"❌ No se obtuvieron datos válidos para {symbol} en {timeframe}")
-                return pd.DataFrame()
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.sort_values('date').reset_index(drop=True)
-            if not validate_dataframe(df):
-                logger.error("Datos de mercado inválidos tras la obtención.")
-                return pd.DataFrame()
-            return df.tail(limit).reset_index(drop=True)
+            self._throttle()
+            with timed_stage(f'download_{timeframe}'):
+                response = self.session.get(self._market_data_url(symbol, timeframe), params=self._market_data_params(since),
+                                            headers=self.headers, timeout=15)
+                response.raise_for_status()
+                content = response.content
+            return self._parse_market_data(content, symbol, timeframe, since, limit)
         except requests.exceptions.Timeout:
             logger.error(f"❌ Timeout obteniendo datos para {timeframe}")
         except requests.exceptions.ConnectionError:
@@ -52,25 +246,122 @@ class IntegratedSMCStrategy:
         except requests.exceptions.HTTPError as e:
             logger.error(f"❌ Error HTTP {e.response.status_code} para {symbol}")
         except Exception as e:
-            logger.error(f"❌ Error inesperado: {str(e)}")
+            logger.error(f"❌ Error inesperado: {self._redact(e)}")
+        return pd.DataFrame()
+
+    async def _download_market_data_async(self, symbol: str, timeframe: str, since: datetime = None,
+                                          limit: int = None) -> pd.DataFrame:
+        try:
+            await self._throttle_async()
+            with timed_stage(f'download_{timeframe}'):
+                response = await self._async_client().get(self._market_data_url(symbol, timeframe),
+                                                          params=self._market_data_params(since), headers=self.headers, timeout=15)
+                response.raise_for_status()
+                content = response.content
+            return self._parse_market_data(content, symbol, timeframe, since, limit)
+        except httpx.TimeoutException:
+            logger.error(f"❌ Timeout obteniendo datos para {timeframe}")
+        except httpx.TransportError:
+            logger.error("❌ Error de conexión obteniendo datos.")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"❌ Error HTTP {e.response.status_code} para {symbol}")
+        except Exception as e:
+            logger.error(f"❌ Error inesperado: {self._redact(e)}")
         return pd.DataFrame()
 
     def get_current_price(self, symbol: str = "EURUSD") -> Dict:
-        url = f"https://financialmodelingprep.com/api/v3/fx/{symbol}?apikey={self.api_key}"
         try:
-            response = self.session.get(url, headers=self.headers, timeout=10)
+            self._throttle()
+            response = self.session.get(self._quote_url(symbol), params={'apikey': self.api_key}, headers=self.headers, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            if isinstance(data, list) and len(data) > 0:
-                return data[0]
-            elif isinstance(data, dict):
-                return data
-            logger.error(f"❌ No se obtuvieron datos de precio válidos para {symbol}")
-            return {}
+            return self._parse_quote(response.json(), symbol)
         except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Error obteniendo precio actual: {e}")
+            logger.error(f"❌ Error obteniendo precio actual: {self._redact(e)}")
             return {}
 
+    async def get_current_price_async(self, symbol: str = "EURUSD") -> Dict:
+        try:
+            await self._throttle_async()
+            response = await self._async_client().get(self._quote_url(symbol), params={'apikey': self.api_key},
+                                                      headers=self.headers, timeout=10)
+            response.raise_for_status()
+            return self._parse_quote(response.json(), symbol)
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            # ValueError cubre una respuesta que no es JSON (requests la trata como RequestException)
+            logger.error(f"❌ Error obteniendo precio actual: {self._redact(e)}")
+            return {}
+
+    def _throttle(self) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    async def _throttle_async(self) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # Sin cliente compartido (antes del arranque o con el de la app ya cerrado) se crea uno propio
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(timeout=15, trust_env=False)
+        return self.http_client
+
+    def fetch_market_snapshot(self, symbol: str, timeframes: Optional[List[str]] = None, quote: bool = True) -> Dict:
+        """Lanza en paralelo las peticiones de los timeframes (todos por defecto) y del precio actual.
+
+        Cada petición conserva su propio manejo de errores: un timeframe fallido llega
+        como DataFrame vacío y un precio fallido como diccionario vacío. Los timeframes
+        configurados como 'derive' no se piden: se construyen a partir de las velas de 1min.
+        Con quote=False no se pide el precio y el snapshot lo trae vacío.
+        """
+        fetch_plan = self._fetch_plan(timeframes)
+        with ThreadPoolExecutor(max_workers=len(fetch_plan) + 1) as executor:
+            # Cada hilo recibe una copia del contexto para que sus etapas cuenten en el desglose de la petición
+            frame_futures = {timeframe: executor.submit(contextvars.copy_context().run, _run_timed, f'fetch_{timeframe}',
+                                                        self.get_market_data, symbol, timeframe, limit)
+                             for timeframe, limit in fetch_plan.items()}
+            price_future = executor.submit(contextvars.copy_context().run, _run_timed, 'fetch_quote',
+                                           self.get_current_price, symbol) if quote else None
+            frames = {timeframe: future.result() for timeframe, future in frame_futures.items()}
+            current_data = price_future.result() if quote else {}
+        return self._build_snapshot(frames, current_data, timeframes)
+
+    async def fetch_market_snapshot_async(self, symbol: str, timeframes: Optional[List[str]] = None,
+                                          quote: bool = True) -> Dict:
+        """Versión asíncrona de fetch_market_snapshot sobre el cliente HTTP compartido."""
+        fetch_plan = self._fetch_plan(timeframes)
+        calls = [_run_timed_async(f'fetch_{timeframe}', self.get_market_data_async(symbol, timeframe, limit))
+                     for timeframe, limit in fetch_plan.items()]
+        if quote:
+            calls.append(_run_timed_async('fetch_quote', self.get_current_price_async(symbol)))
+        results = await asyncio.gather(*calls)
+        return self._build_snapshot(dict(zip(fetch_plan, results)), results[-1] if quote else {}, timeframes)
+
+    def _build_snapshot(self, frames: Dict[str, pd.DataFrame], current_data: Dict,
+                        timeframes: Optional[List[str]] = None) -> Dict:
+        base_1min = frames.get('1min')
+        for timeframe, limit in self._market_data_requests(timeframes):
+            if timeframe not in frames:
+                with timed_stage(f'resample_{timeframe}'):
+                    frames[timeframe] = resample_ohlcv(base_1min, timeframe_to_minutes(timeframe)).tail(limit).reset_index(drop=True)
+            else:
+                frames[timeframe] = frames[timeframe].tail(limit).reset_index(drop=True)
+        return {'frames': frames, 'current_data': current_data}
+
+    def _market_data_requests(self, timeframes: Optional[List[str]] = None) -> Tuple[Tuple[str, int], ...]:
+        if timeframes is None:
+            return self.MARKET_DATA_REQUESTS
+        return tuple((timeframe, limit) for timeframe, limit in self.MARKET_DATA_REQUESTS if timeframe in timeframes)
+
+    def _fetch_plan(self, timeframes: Optional[List[str]] = None) -> Dict[str, int]:
+        """Timeframes que se piden al proveedor; el de 1min se amplía para cubrir los derivados."""
+        plan = {}
+        for timeframe, limit in self._market_data_requests(timeframes):
+            if timeframe != '1min' and self.config.timeframe_sources.get(timeframe) == 'derive':
+                plan['1min'] = max(plan.get('1min', 0), limit * timeframe_to_minutes(timeframe))
+            else:
+                plan[timeframe] = max(plan.get(timeframe, 0), limit)
+        return plan
+
     def detect_swing_points_vectorized(self, df: pd.DataFrame, period: int = None) -> Dict:
         if period is None: period = self.config.swing_period
         if len(df) < period * 2 + 1:
@@ -92,97 +383,201 @@ class IntegratedSMCStrategy:
         all_swings = sorted(swing_highs + swing_lows, key=lambda x: x['time'])
         return {'swing_highs': swing_highs, 'swing_lows': swing_lows, 'all_swings': all_swings}
 
+    def create_swing_detector(self, period: int = None, max_swings: int = None) -> StreamingSwingDetector:
+        """Detector incremental equivalente a detect_swing_points_vectorized para feeds en vivo o replays."""
+        return StreamingSwingDetector(period or self.config.swing_period, max_swings)
+
+    def find_liquidity_level_arrays(self, all_swings: List[Dict]) -> Dict[str, np.ndarray]:
+        """Agrupa los swings en niveles de liquidez; columnas ordenadas por (strength desc, freshness asc)."""
+        if not all_swings:
+            return {'price': np.empty(0), 'is_high': np.empty(0, dtype=bool), 'touches': np.empty(0, dtype=np.int64),
+                    'strength': np.empty(0, dtype=np.int64), 'freshness': np.empty(0), 'last_touch': np.empty(0, dtype=np.int64)}
+        count = len(all_swings)
+        prices = np.fromiter((swing['price'] for swing in all_swings), dtype=np.float64, count=count)
+        is_high = np.fromiter((swing['type'] == 'high' for swing in all_swings), dtype=bool, count=count)
+        times = np.array([swing['time'] for swing in all_swings], dtype='datetime64[ns]').view(np.int64)
+
+        labels = _cluster_labels(prices, self.config.liquidity_tolerance)
+        # Swings agrupados por cluster (en orden de llegada dentro de cada uno) y reducciones por tramo
+        order = np.argsort(labels, kind='stable')
+        starts = np.flatnonzero(np.diff(labels[order], prepend=-1))
+        touches = np.diff(np.append(starts, count))
+        avg_price = np.add.reduceat(prices[order], starts) / touches
+        high_touches = np.add.reduceat(is_high[order].astype(np.int64), starts)
+        latest_touch = np.maximum.reduceat(times[order], starts)
+        freshness = _minutes_since(self.clock(), latest_touch)
+        strength = np.minimum(touches * 10, 100)
+
+        # Empates de (strength, freshness) en orden de creación del cluster, como el sort estable original
+        fresh = np.flatnonzero(freshness <= self.config.max_freshness_minutes)
+        fresh = fresh[np.lexsort((fresh, freshness[fresh], -strength[fresh]))]
+        return {'price': avg_price[fresh], 'is_high': high_touches[fresh] >= touches[fresh] / 2, 'touches': touches[fresh],
+                'strength': strength[fresh], 'freshness': freshness[fresh], 'last_touch': latest_touch[fresh]}
+
     def find_liquidity_levels(self, all_swings: List[Dict]) -> List[Dict]:
-        if not all_swings: return []
-        grouped_levels = {}
-        tolerance = self.config.liquidity_tolerance
-        current_time = datetime.now()
-        for swing in all_swings:
-            matched = False
-            for level_price_key in list(grouped_levels.keys()):
-                if abs(swing['price'] - level_price_key) < tolerance:
-                    level_data = grouped_levels[level_price_key]
-                    level_data['touches'].append(swing)
-                    level_data['sum_price'] += swing['price']
-                    level_data['count'] += 1
-                    level_data['avg_price'] = level_data['sum_price'] / level_data['count']
-                    latest_touch_time = max([pd.to_datetime(t['time']) for t in level_data['touches']])
-                    level_data['freshness'] = (current_time - latest_touch_time).total_seconds() / 60
-                    matched = True
-                    break
-            if not matched:
-                swing_time = pd.to_datetime(swing['time'])
-                freshness = (current_time - swing_time).total_seconds() / 60
-                grouped_levels[swing['price']] = {
-                    'avg_price': swing['price'], 'touches': [swing], 'count': 1, 'sum_price': swing['price'],
-                    'freshness': freshness, 'is_swept': False, 'strength': 1
-                }
-        liquidity_levels = []
-        for _, data in grouped_levels.items():
-            high_touches = sum(1 for t in data['touches'] if t['type'] == 'high')
-            level_type = 'high' if high_touches >= len(data['touches']) / 2 else 'low'
-            strength = min(data['count'] * 10, 100)
-            liquidity_levels.append({
-                'price': data['avg_price'], 'type': level_type, 'touches_count': data['count'],
-                'strength': strength, 'freshness': data['freshness'],
-                'last_touch_time': max([t['time'] for t in data['touches']]), 'is_swept': data['is_swept']
-            })
-        fresh_levels = [lvl for lvl in liquidity_levels if lvl['freshness'] <= self.config.max_freshness_minutes]
-        return sorted(fresh_levels, key=lambda x: (x['strength'], -x['freshness']), reverse=True)
+        levels = self.find_liquidity_level_arrays(all_swings)
+        return [{'price': price, 'type': 'high' if is_high else 'low', 'touches_count': int(touches), 'strength': int(strength),
+                 'freshness': freshness, 'last_touch_time': pd.Timestamp(last_touch), 'is_swept': False}
+                for price, is_high, touches, strength, freshness, last_touch
+                in zip(levels['price'], levels['is_high'], levels['touches'], levels['strength'], levels['freshness'],
+                       levels['last_touch'])]
+
+    def detect_order_block_arrays(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Detecta order blocks con máscaras NumPy sobre las columnas OHLC completas.
+
+        Devuelve columnas ya ordenadas por (strength desc, freshness asc); `index`
+        apunta a la vela del order block dentro de `df`.
+        """
+        empty = {key: np.empty(0) for key in ('price', 'zone_min', 'zone_max', 'size_pips', 'freshness', 'strength')}
+        empty.update(index=np.empty(0, dtype=np.int64), is_bullish=np.empty(0, dtype=bool))
+        if len(df) < 3: return empty
+        opens, highs, lows, closes = (_numeric_column(df, col) for col in ('open', 'high', 'low', 'close'))
+        # Vela candidata i (1..n-2) frente a la vela siguiente i+1
+        o, h, l, c = opens[1:-1], highs[1:-1], lows[1:-1], closes[1:-1]
+        next_close = closes[2:]
+        ob_size = np.abs(o - c) * self.PRICE_MULTIPLIER
+        bullish = (c < o) & (next_close > h) & ((ob_size >= 2) | (np.abs(next_close - h) * self.PRICE_MULTIPLIER >= 3))
+        bearish = (c > o) & (next_close < l) & ((ob_size >= 2) | (np.abs(l - next_close) * self.PRICE_MULTIPLIER >= 3))
+        candidates = np.flatnonzero(bullish | bearish)
+        freshness = _minutes_since(self.clock(), _epoch_ns(df)[candidates + 1])
+        keep = freshness <= self.config.max_freshness_minutes
+        candidates, freshness = candidates[keep], freshness[keep]
+        is_bullish = bullish[candidates]
+        size_pips = ob_size[candidates]
+        strength = np.minimum(size_pips * 5, 100)
+        order = np.lexsort((candidates, freshness, -strength))
+        return {
+            'index': candidates[order] + 1,
+            'is_bullish': is_bullish[order],
+            'price': np.where(is_bullish, l[candidates], h[candidates])[order],
+            'zone_min': np.where(is_bullish, l[candidates], c[candidates])[order],
+            'zone_max': np.where(is_bullish, o[candidates], h[candidates])[order],
+            'size_pips': size_pips[order],
+            'freshness': freshness[order],
+            'strength': strength[order],
+        }
 
     def detect_order_blocks(self, df: pd.DataFrame) -> List[Dict]:
-        order_blocks = []
-        if len(df) < 3: return order_blocks
-        current_time = datetime.now()
-        for i in range(1, len(df) - 1):
-            current_candle, next_candle = df.iloc[i], df.iloc[i+1]
-            if not all(isinstance(current_candle[col], (int, float)) for col in ['open', 'high', 'low', 'close']): continue
-            ob_size = abs(current_candle['open'] - current_candle['close']) * self.PRICE_MULTIPLIER
-            if current_candle['close'] < current_candle['open'] and next_candle['close'] > current_candle['high']:
-                if ob_size >= 2 or abs(next_candle['close'] - current_candle['high']) * self.PRICE_MULTIPLIER >= 3:
-                    freshness = (current_time - pd.to_datetime(current_candle['date'])).total_seconds() / 60
-                    if freshness <= self.config.max_freshness_minutes:
-                        order_blocks.append({'type': 'bullish', 'price': current_candle['low'], 'zone_min': current_candle['low'], 'zone_max': current_candle['open'], 'time': current_candle['date'], 'size_pips': ob_size, 'freshness': freshness, 'validated_by_sweep': False, 'strength': min(ob_size * 5, 100)})
-            elif current_candle['close'] > current_candle['open'] and next_candle['close'] < current_candle['low']:
-                if ob_size >= 2 or abs(current_candle['low'] - next_candle['close']) * self.PRICE_MULTIPLIER >= 3:
-                    freshness = (current_time - pd.to_datetime(current_candle['date'])).total_seconds() / 60
-                    if freshness <= self.config.max_freshness_minutes:
-                        order_blocks.append({'type': 'bearish', 'price': current_candle['high'], 'zone_min': current_candle['close'], 'zone_max': current_candle['high'], 'time': current_candle['date'], 'size_pips': ob_size, 'freshness': freshness, 'validated_by_sweep': False, 'strength': min(ob_size * 5, 100)})
-        return sorted(order_blocks, key=lambda x: (x['strength'], -x['freshness']), reverse=True)
-
-    def detect_fair_value_gaps(self, df: pd.DataFrame) -> List[Dict]:
-        fvg_zones = []
-        if len(df) < 3: return fvg_zones
-        current_time = datetime.now()
-        for i in range(2, len(df)):
-            candle1, candle3 = df.iloc[i-2], df.iloc[i]
-            time = df.iloc[i-1]['date']
-            freshness = (current_time - pd.to_datetime(time)).total_seconds() / 60
-            if freshness > self.config.max_freshness_minutes: continue
-            if candle1['low'] > candle3['high']:
-                gap_size = (candle1['low'] - candle3['high']) * self.PRICE_MULTIPLIER
-                fvg_zones.append({'type': 'bullish', 'zone_min': candle3['high'], 'zone_max': candle1['low'], 'time': time, 'freshness': freshness, 'gap_size_pips': gap_size, 'strength': min(gap_size * 10, 100)})
-            elif candle1['high'] < candle3['low']:
-                gap_size = (candle3['low'] - candle1['high']) * self.PRICE_MULTIPLIER
-                fvg_zones.append({'type': 'bearish', 'zone_min': candle1['high'], 'zone_max': candle3['low'], 'time': time, 'freshness': freshness, 'gap_size_pips': gap_size, 'strength': min(gap_size * 10, 100)})
-        return sorted(fvg_zones, key=lambda x: (x['strength'], -x['freshness']), reverse=True)
+        blocks = self.detect_order_block_arrays(df)
+        times = df['date'].iloc[blocks['index']]
+        return [{'type': 'bullish' if is_bullish else 'bearish', 'price': price, 'zone_min': zone_min, 'zone_max': zone_max,
+                 'time': time, 'size_pips': size_pips, 'freshness': freshness, 'validated_by_sweep': False, 'strength': strength}
+                for is_bullish, price, zone_min, zone_max, time, size_pips, freshness, strength
+                in zip(blocks['is_bullish'], blocks['price'], blocks['zone_min'], blocks['zone_max'], times,
+                       blocks['size_pips'], blocks['freshness'], blocks['strength'])]
+
+    def detect_fair_value_gap_arrays(self, df: pd.DataFrame, track_fill: bool = False) -> Dict[str, np.ndarray]:
+        """Detecta FVGs comparando los arrays desplazados (vela i-2 frente a vela i) en una sola pasada.
+
+        `index` apunta a la vela central del gap. Con `track_fill=True` se añade `is_filled`,
+        calculado con un máximo/mínimo acumulado desde el final: un gap bullish se llena cuando
+        un high posterior alcanza `zone_max` y uno bearish cuando un low posterior alcanza `zone_min`.
+        """
+        columns = ('zone_min', 'zone_max', 'gap_size_pips', 'freshness', 'strength')
+        empty = {key: np.empty(0) for key in columns}
+        empty.update(index=np.empty(0, dtype=np.int64), is_bullish=np.empty(0, dtype=bool))
+        if track_fill: empty['is_filled'] = np.empty(0, dtype=bool)
+        if len(df) < 3: return empty
+        highs, lows = _numeric_column(df, 'high'), _numeric_column(df, 'low')
+        freshness = _minutes_since(self.clock(), _epoch_ns(df)[1:-1])
+        fresh = freshness <= self.config.max_freshness_minutes
+        high1, low1, high3, low3 = highs[:-2], lows[:-2], highs[2:], lows[2:]
+        bullish = fresh & (low1 > high3)
+        bearish = fresh & ~bullish & (high1 < low3)
+        candidates = np.flatnonzero(bullish | bearish)
+        is_bullish = bullish[candidates]
+        zone_min = np.where(is_bullish, high3[candidates], high1[candidates])
+        zone_max = np.where(is_bullish, low1[candidates], low3[candidates])
+        gap_size = (zone_max - zone_min) * self.PRICE_MULTIPLIER
+        strength = np.minimum(gap_size * 10, 100)
+        freshness = freshness[candidates]
+        order = np.lexsort((candidates, freshness, -strength))
+        result = {
+            'index': candidates[order] + 1,
+            'is_bullish': is_bullish[order],
+            'zone_min': zone_min[order],
+            'zone_max': zone_max[order],
+            'gap_size_pips': gap_size[order],
+            'freshness': freshness[order],
+            'strength': strength[order],
+        }
+        if track_fill:
+            # Extremo alcanzado después de la tercera vela (posición i+1 en los arrays originales)
+            later_high = np.append(np.maximum.accumulate(highs[::-1])[::-1], -np.inf)[candidates + 3]
+            later_low = np.append(np.minimum.accumulate(lows[::-1])[::-1], np.inf)[candidates + 3]
+            is_filled = np.where(is_bullish, later_high >= zone_max, later_low <= zone_min)
+            result['is_filled'] = is_filled[order]
+        return result
+
+    def detect_fair_value_gaps(self, df: pd.DataFrame, track_fill: bool = False) -> List[Dict]:
+        gaps = self.detect_fair_value_gap_arrays(df, track_fill)
+        times = df['date'].iloc[gaps['index']]
+        fvg_zones = [{'type': 'bullish' if is_bullish else 'bearish', 'zone_min': zone_min, 'zone_max': zone_max, 'time': time,
+                      'freshness': freshness, 'gap_size_pips': gap_size, 'strength': strength}
+                     for is_bullish, zone_min, zone_max, time, freshness, gap_size, strength
+                     in zip(gaps['is_bullish'], gaps['zone_min'], gaps['zone_max'], times,
+                            gaps['freshness'], gaps['gap_size_pips'], gaps['strength'])]
+        if track_fill:
+            for fvg, is_filled in zip(fvg_zones, gaps['is_filled']):
+                fvg['is_filled'] = bool(is_filled)
+        return fvg_zones
+
+    def detect_liquidity_sweep_arrays(self, df: pd.DataFrame, level_prices: np.ndarray, level_is_high: np.ndarray) -> Dict[str, np.ndarray]:
+        """Sweeps de los niveles dados en las últimas velas; `level` indexa los arrays de entrada y
+        el resultado va ordenado por frescura."""
+        empty = {'level': np.empty(0, dtype=np.int64), 'freshness': np.empty(0), 'time': np.empty(0, dtype=np.int64)}
+        if len(df) < 2 or len(level_prices) == 0: return empty
+        window = df.tail(self.config.sweep_lookback_candles)
+        lows, highs, closes = (_numeric_column(window, col)[np.newaxis, :] for col in ('low', 'high', 'close'))
+        prices = np.asarray(level_prices, dtype=np.float64)[:, np.newaxis]
+        is_high = np.asarray(level_is_high, dtype=bool)[:, np.newaxis]
+
+        # Matriz nivel x vela con las condiciones de sweep de mínimos y de máximos
+        swept = (~is_high & (lows < prices) & (closes > prices)) | (is_high & (highs > prices) & (closes < prices))
+        # Vela más reciente que cumple la condición para cada nivel
+        last_hit = swept.shape[1] - 1 - np.argmax(swept[:, ::-1], axis=1)
+        dates = _epoch_ns(window)
+        sweep_freshness = _minutes_since(self.clock(), dates[last_hit])
+        hit_levels = np.flatnonzero(swept.any(axis=1) & (sweep_freshness < self.config.max_freshness_minutes))
+        hit_levels = hit_levels[np.argsort(sweep_freshness[hit_levels], kind='stable')]
+        return {'level': hit_levels, 'freshness': sweep_freshness[hit_levels], 'time': dates[last_hit[hit_levels]]}
 
     def detect_liquidity_sweeps(self, df: pd.DataFrame, liquidity_levels: List[Dict]) -> List[Dict]:
-        if len(df) < 2 or not liquidity_levels: return []
-        current_time = datetime.now()
-        sweeps = []
-        for level in liquidity_levels:
-            for i in range(len(df) - 1, max(-1, len(df) - 20), -1):
-                candle = df.iloc[i]
-                if (level['type'] == 'low' and candle['low'] < level['price'] and candle['close'] > level['price']) or \
-                   (level['type'] == 'high' and candle['high'] > level['price'] and candle['close'] < level['price']):
-                    sweep_freshness = (current_time - pd.to_datetime(candle['date'])).total_seconds() / 60
-                    if sweep_freshness < self.config.max_freshness_minutes:
-                        level['is_swept'] = True
-                        sweeps.append({'type': 'bullish_sweep' if level['type'] == 'low' else 'bearish_sweep', 
-                                       'level_price': level['price'], 'time': candle['date'], 'freshness': sweep_freshness})
-                        break
-        return sorted(sweeps, key=lambda x: x['freshness'])
+        if not liquidity_levels: return []
+        sweeps = self.detect_liquidity_sweep_arrays(
+            df, np.fromiter((level['price'] for level in liquidity_levels), dtype=np.float64, count=len(liquidity_levels)),
+            np.array([level['type'] == 'high' for level in liquidity_levels], dtype=bool))
+        for level_index in sweeps['level']:
+            liquidity_levels[level_index]['is_swept'] = True
+        return self._sweep_records({'price': [level['price'] for level in liquidity_levels],
+                                    'is_high': [level['type'] == 'high' for level in liquidity_levels]}, sweeps)
+
+    @staticmethod
+    def _sweep_records(liquidity: Dict, sweeps: Dict[str, np.ndarray]) -> List[Dict]:
+        return [{'type': 'bearish_sweep' if liquidity['is_high'][level_index] else 'bullish_sweep',
+                 'level_price': liquidity['price'][level_index], 'time': time, 'freshness': freshness}
+                for level_index, freshness, time in zip(sweeps['level'], sweeps['freshness'], pd.to_datetime(sweeps['time']))]
+
+    def collect_zones(self, df: pd.DataFrame, order_blocks: Dict[str, np.ndarray], fvg_zones: Dict[str, np.ndarray],
+                      liquidity: Dict[str, np.ndarray], sweeps: Dict[str, np.ndarray]) -> ZoneArray:
+        """Reúne en un ZoneArray las salidas en columnas de los detectores (order blocks, FVGs, liquidez)."""
+        dates = _epoch_ns(df)
+        ob_bullish, fvg_bullish = order_blocks['is_bullish'], fvg_zones['is_bullish']
+        is_swept = np.zeros(len(liquidity['price']), dtype=bool)
+        is_swept[sweeps['level']] = True
+        tolerance = self.config.liquidity_tolerance
+        return ZoneArray.concat([
+            ZoneArray.from_columns(zones.ORDER_BLOCK, np.where(ob_bullish, zones.BULLISH, zones.BEARISH),
+                                   np.where(ob_bullish, order_blocks['zone_min'], order_blocks['zone_max']),
+                                   order_blocks['zone_min'], order_blocks['zone_max'], order_blocks['strength'],
+                                   order_blocks['freshness'], dates[order_blocks['index']]),
+            ZoneArray.from_columns(zones.FAIR_VALUE_GAP, np.where(fvg_bullish, zones.BULLISH, zones.BEARISH),
+                                   (fvg_zones['zone_min'] + fvg_zones['zone_max']) / 2, fvg_zones['zone_min'],
+                                   fvg_zones['zone_max'], fvg_zones['strength'], fvg_zones['freshness'], dates[fvg_zones['index']]),
+            ZoneArray.from_columns(zones.LIQUIDITY, np.where(liquidity['is_high'], zones.HIGH, zones.LOW), liquidity['price'],
+                                   liquidity['price'] - tolerance, liquidity['price'] + tolerance, liquidity['strength'],
+                                   liquidity['freshness'], liquidity['last_touch'], liquidity['touches'], is_swept),
+        ])
 
     def detect_bos_choch_improved(self, df: pd.DataFrame, swings: Dict) -> Dict:
         default_response = {'bos': False, 'choch': False, 'signal': None, 'trend': 'N/A'}
@@ -215,7 +610,7 @@ class IntegratedSMCStrategy:
         return {'bos': bos_detected, 'choch': choch_detected, 'signal': signal, 'trend': trend}
     
     def detect_kill_zones(self) -> KillZoneInfo:
-        utc_now = datetime.now(pytz.utc)
+        utc_now = self.clock(pytz.utc)
         current_hour, current_minute = utc_now.hour, utc_now.minute
         zones = {'Asia': (0, 4, 'medium'), 'London': (7, 10, 'high'), 'New York': (12, 15, 'high'), 'London Close': (15, 17, 'medium')}
         for zone_name, (start, end, priority) in zones.items():
@@ -242,142 +637,67 @@ class IntegratedSMCStrategy:
         return PremiumDiscountZones(equilibrium, premium_start, discount_end, range_high, range_low, 'EQUILIBRIUM')
 
     def calculate_confluence_score(self, level: Dict, context: Dict) -> int:
-        score = 40
-        
-        kill_zone = context.get('kill_zone')
-        if kill_zone and kill_zone.is_active:
-            if kill_zone.priority == 'high': score += 30
-            elif kill_zone.priority == 'medium': score += 20
-        
-        pd_zones = context.get('premium_discount_zones')
-        current_price = context.get('current_price', 0)
-        if pd_zones and pd_zones.equilibrium:
-            is_bullish_buy = level.get('type') in ['bullish', 'low']
-            is_bearish_sell = level.get('type') in ['bearish', 'high']
-            is_in_discount = current_price <= pd_zones.discount_end
-            is_in_premium = current_price >= pd_zones.premium_start
-            if (is_bullish_buy and is_in_discount) or (is_bearish_sell and is_in_premium):
-                score += 25
-        
-        touches = level.get('touches_count', 1)
-        if touches >= 3: score += 20
-        elif touches >= 2: score += 10
-        
-        freshness = level.get('freshness', 999)
-        if freshness <= 15: score += 15
-        elif freshness <= 30: score += 10
-        elif freshness <= 60: score += 5
-        
-        strength = level.get('strength', 0)
-        if strength >= 80: score += 10
-        elif strength >= 60: score += 7
-        elif strength >= 40: score += 5
-        
-        if level.get('is_swept', False) and level.get('source') != 'Liquidity':
-            score += 10
-        
-        return min(score, 100)
+        """Puntuación de un único nivel (diccionario); usa las mismas reglas que el cálculo por lotes."""
+        columns = {
+            'type': np.array([scoring.TYPE_CODES.get(level.get('type'), scoring.UNKNOWN_CODE)]),
+            'source': np.array([scoring.SOURCE_CODES.get(level.get('source'), scoring.UNKNOWN_CODE)]),
+            'touches': [level.get('touches_count', 1)],
+            'freshness': [level.get('freshness', 999)],
+            'strength': [level.get('strength', 0)],
+            'is_swept': [bool(level.get('is_swept', False))],
+        }
+        return int(self.scorer.score(columns, context)[0])
 
-    def find_reaction_levels(self, df: pd.DataFrame, liquidity_levels: List[Dict], 
-                             current_price: float, order_blocks: List[Dict],
-                             fvg_zones: List[Dict], sweeps: List[Dict],
-                             kill_zone: KillZoneInfo, premium_discount: PremiumDiscountZones) -> List[Dict]:
-        reaction_levels = []
-        all_sources = []
-        
-        for ob in order_blocks:
-            ob['source'] = 'Order Block'
-            ob['price'] = ob['zone_min'] if ob['type'] == 'bullish' else ob['zone_max']
-            all_sources.append(ob)
-        
-        for fvg in fvg_zones:
-            fvg['source'] = 'Fair Value Gap'
-            fvg['price'] = (fvg['zone_min'] + fvg['zone_max']) / 2
-            all_sources.append(fvg)
-        
-        for lvl in liquidity_levels:
-            lvl['source'] = 'Liquidity'
-            all_sources.append(lvl)
-        
+    def find_reaction_levels(self, zone_array: ZoneArray, current_price: float, kill_zone: KillZoneInfo,
+                             premium_discount: PremiumDiscountZones, price_index: PriceIndex = None) -> List[Dict]:
+        price_index = price_index or PriceIndex.from_zones(zone_array)
+        nearby = zone_array[price_index.within(current_price, self.config.max_distance_pips, self.PRICE_MULTIPLIER)]
         context = {
             'kill_zone': kill_zone,
             'premium_discount_zones': premium_discount,
             'current_price': current_price
         }
+        scores = self.scorer.score_zones(nearby, context)
+        keep = np.flatnonzero(scores >= self.config.min_confluence_score)
+        keep = keep[np.argsort(-scores[keep], kind='stable')]
+        records, scores = nearby[keep].to_records(), scores[keep]
 
-        for level in all_sources:
-            distance_pips = abs(level['price'] - current_price) * self.PRICE_MULTIPLIER
-            if distance_pips > self.config.max_distance_pips: continue
-            
-            level_type = level.get('type')
-            if level['source'] == 'Liquidity':
-                level['type'] = 'low' if level_type == 'low' else 'high'
-            elif level['source'] == 'Order Block':
-                level['type'] = 'bullish' if level_type == 'bullish' else 'bearish'
-            elif level['source'] == 'Fair Value Gap':
-                level['type'] = 'bullish' if level_type == 'bullish' else 'bearish'
-                
-            level['confluence_score'] = self.calculate_confluence_score(level, context)
-            
-            reason = f"{level['type'].capitalize()} {level['source']}"
-            if level.get('is_swept'):
+        high_confluence_suffix = " | CONFLUENCIA ALTA"
+        if kill_zone.is_active and kill_zone.priority == 'high':
+            high_confluence_suffix += f" en {kill_zone.name}"
+        reaction_levels = []
+        for record, score in zip(records, scores.tolist()):
+            is_buy = record['type'] in ('bullish', 'low')
+            reason = f"{record['type'].capitalize()} {record['source']}"
+            if record['is_swept']:
                 reason += " (Validado por Sweep)"
-
-            if level['confluence_score'] >= 70:
-                reason += " | CONFLUENCIA ALTA"
-                if kill_zone.is_active and kill_zone.priority == 'high':
-                    reason += f" en {kill_zone.name}"
+            if score >= 70:
+                reason += high_confluence_suffix
                 if premium_discount.equilibrium:
-                    is_bullish_buy = level['type'] in ['bullish', 'low']
-                    pos = "Discount" if is_bullish_buy else "Premium"
-                    reason += f" en zona {pos}"
-            
+                    reason += f" en zona {'Discount' if is_buy else 'Premium'}"
             reaction_levels.append({
-                'action': 'BUY' if level['type'] in ['bullish', 'low'] else 'SELL',
-                'price': level['price'],
-                'entry_zone_min': level.get('zone_min', level['price'] - self.config.liquidity_tolerance),
-                'entry_zone_max': level.get('zone_max', level['price'] + self.config.liquidity_tolerance),
-                'distance_pips': distance_pips,
-                'confidence': level['confluence_score'],
-                'source': level['source'],
-                'freshness': level['freshness'],
+                'action': 'BUY' if is_buy else 'SELL',
+                'price': record['price'],
+                'entry_zone_min': record['zone_min'],
+                'entry_zone_max': record['zone_max'],
+                'distance_pips': abs(record['price'] - current_price) * self.PRICE_MULTIPLIER,
+                'confidence': score,
+                'source': record['source'],
+                'freshness': record['freshness'],
                 'reason': reason
             })
+        return reaction_levels
 
-        return sorted([lvl for lvl in reaction_levels if lvl['confidence'] >= self.config.min_confluence_score], key=lambda x: x['confidence'], reverse=True)
+    def find_closest_elements(self, current_price: float, zone_array: ZoneArray, sweeps: List[Dict], structure: Dict,
+                              price_index: PriceIndex = None) -> Dict:
+        price_index = price_index or PriceIndex.from_zones(zone_array)
+        closest = {}
+        for key, source in (('closest_order_block', zones.ORDER_BLOCK), ('closest_fvg', zones.FAIR_VALUE_GAP),
+                            ('closest_liquidity', zones.LIQUIDITY)):
+            row = price_index.nearest(current_price, source)
+            closest[key] = zone_array[row].to_records()[0] if row is not None else None
+        closest['closest_sweep'] = min(sweeps, key=lambda sweep: abs(sweep['level_price'] - current_price)) if sweeps else None
 
-    def _find_closest_element(self, current_price: float, elements: List[Dict], key: str = 'price') -> Optional[Dict]:
-        if not elements: 
-            return None
-        
-        closest_element = None
-        min_distance = float('inf')
-        
-        for element in elements:
-            if key in element:
-                distance = abs(element[key] - current_price)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_element = element
-        
-        return closest_element
-
-    def find_closest_elements(self, current_price: float, order_blocks: List[Dict], 
-                             fvg_zones: List[Dict], liquidity_levels: List[Dict], 
-                             sweeps: List[Dict], structure: Dict) -> Dict:
-        closest_ob = self._find_closest_element(current_price, order_blocks)
-        
-        fvg_with_center = []
-        for fvg in fvg_zones:
-            fvg_copy = fvg.copy()
-            fvg_copy['price'] = (fvg['zone_min'] + fvg['zone_max']) / 2
-            fvg_with_center.append(fvg_copy)
-        closest_fvg = self._find_closest_element(current_price, fvg_with_center)
-        
-        closest_liquidity = self._find_closest_element(current_price, liquidity_levels)
-        
-        closest_sweep = self._find_closest_element(current_price, sweeps, 'level_price')
-        
         mss_info = None
         if structure.get('bos') or structure.get('choch'):
             mss_info = {
@@ -386,60 +706,55 @@ class IntegratedSMCStrategy:
                 'trend': structure.get('trend'),
                 'description': f"{'Break of Structure' if structure.get('bos') else 'Change of Character'} detectado - Tendencia: {structure.get('trend', 'N/A')}"
             }
-        
-        return {
-            'closest_order_block': closest_ob,
-            'closest_fvg': closest_fvg,
-            'closest_liquidity': closest_liquidity,
-            'closest_sweep': closest_sweep,
-            'market_structure_shift': mss_info
-        }
+        closest['market_structure_shift'] = mss_info
+        return closest
 
-    def analyze_symbol(self, symbol: str) -> Dict:
+    def analyze_symbol(self, symbol: str, debug: bool = False, fields: Optional[List[str]] = None) -> Dict:
+        """Análisis de un símbolo; con `fields` solo se descargan y calculan los campos pedidos."""
         logger.info(f"Iniciando análisis SMC + ICT de {symbol}...")
-        
-        df_1min = self.get_market_data(symbol, "1min", 200)
-        df_5min = self.get_market_data(symbol, "5min", 100)
-        df_15min = self.get_market_data(symbol, "15min", 50)
-        
-        if df_1min.empty or df_5min.empty or df_15min.empty:
-            return {'error': 'No se pudieron obtener datos suficientes de todos los timeframes'}
-        
-        current_data = self.get_current_price(symbol)
-        current_price = current_data.get('ask', df_1min.iloc[-1]['close']) 
-        
-        active_kill_zone = self.detect_kill_zones()
-        swings_15min = self.detect_swing_points_vectorized(df_15min)
-        premium_discount_zones = self.calculate_premium_discount_zones(swings_15min)
-        
-        swings_1min = self.detect_swing_points_vectorized(df_1min)
-        liquidity_1min = self.find_liquidity_levels(swings_1min['all_swings'])
-        sweeps_1min = self.detect_liquidity_sweeps(df_1min, liquidity_1min)
-        structure_1min = self.detect_bos_choch_improved(df_1min, swings_1min)
-        order_blocks_1min = self.detect_order_blocks(df_1min)
-        fvg_zones_1min = self.detect_fair_value_gaps(df_1min)
-        
-        reaction_levels = self.find_reaction_levels(
-            df_1min, liquidity_1min, current_price, order_blocks_1min, 
-            fvg_zones_1min, sweeps_1min, active_kill_zone, premium_discount_zones
-        )
+        fields = normalize_fields(fields)
+        timeframes, quote = self.required_inputs(fields)
+        with collect_stages() as stages:
+            with timed_stage('fetch_snapshot'):
+                snapshot = self.fetch_market_snapshot(symbol, timeframes, quote)
+            result = self.analyze_snapshot(symbol, snapshot, fields)
+        if debug:
+            result['debug'] = _stage_breakdown(stages)
+        return result
 
-        closest_elements = self.find_closest_elements(
-            current_price, order_blocks_1min, fvg_zones_1min, 
-            liquidity_1min, sweeps_1min, structure_1min
-        )
+    async def analyze_symbol_async(self, symbol: str, debug: bool = False, fields: Optional[List[str]] = None) -> Dict:
+        """Como analyze_symbol, pero descarga con el cliente asíncrono y ejecuta los detectores en un hilo."""
+        logger.info(f"Iniciando análisis SMC + ICT de {symbol}...")
+        fields = normalize_fields(fields)
+        timeframes, quote = self.required_inputs(fields)
+        with collect_stages() as stages:
+            with timed_stage('fetch_snapshot'):
+                snapshot = await self.fetch_market_snapshot_async(symbol, timeframes, quote)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, contextvars.copy_context().run, self.analyze_snapshot,
+                                                symbol, snapshot, fields)
+        if debug:
+            result['debug'] = _stage_breakdown(stages)
+        return result
 
-        return {
-            'symbol': symbol, 
-            'current_price': current_price,
-            'analysis_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'structure_1min': structure_1min,
-            'reaction_levels': reaction_levels,
-            'active_kill_zone': active_kill_zone,
-            'premium_discount_zones': premium_discount_zones,
-            'closest_elements': closest_elements,
-            'recommendation': self.generate_recommendation(reaction_levels, structure_1min)
-        }
+    def required_inputs(self, fields: Tuple[str, ...]) -> Tuple[List[str], bool]:
+        """(timeframes a descargar, si hace falta el precio actual) para calcular `fields`."""
+        needed = dependencies(fields)
+        timeframes = [timeframe for timeframe, _ in self.MARKET_DATA_REQUESTS if f'frame_{timeframe}' in needed]
+        return timeframes, 'quote' in needed
+
+    def analyze_snapshot(self, symbol: str, snapshot: Dict, fields: Optional[List[str]] = None) -> Dict:
+        """Ejecuta los detectores sobre un snapshot ya descargado (sin red)."""
+        values = {'symbol': symbol, 'quote': snapshot['current_data']}
+        values.update((f'frame_{timeframe}', df) for timeframe, df in snapshot['frames'].items())
+        return AnalysisGraph(self, values).evaluate(fields)
+
+    def analyze_with_swings(self, symbol: str, df_1min: pd.DataFrame, current_price: float, swings_1min: Dict,
+                            premium_discount_zones: PremiumDiscountZones, fields: Optional[List[str]] = None) -> Dict:
+        """Resto del análisis a partir de los swings de 1min y las zonas premium/discount ya calculados
+        (el estado en vivo los mantiene de forma incremental)."""
+        return AnalysisGraph(self, {'symbol': symbol, 'frame_1min': df_1min, 'current_price': current_price,
+                                    'swings_1min': swings_1min, 'premium_discount_zones': premium_discount_zones}).evaluate(fields)
 
     def generate_recommendation(self, reaction_levels: List[Dict], structure_1min: Dict) -> Dict:
         recommendation = {'action': 'HOLD', 'confidence': 0, 'reason': 'Esperando confluencia de alta probabilidad.'}
@@ -456,3 +771,15 @@ class IntegratedSMCStrategy:
         recommendation['primary_source'] = best_level['source']
         recommendation['reason'] = best_level['reason']
         return recommendation
+
+
+def analyze_market_snapshot(config: TradingConfig, symbol: str, snapshot: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """Punto de entrada serializable para ejecutar los detectores en un pool de procesos.
+
+    El desglose de etapas viaja en `debug`, porque las métricas del proceso hijo no se exponen.
+    """
+    strategy = IntegratedSMCStrategy(api_key=None, config=config)
+    with collect_stages() as stages:
+        result = strategy.analyze_snapshot(symbol, snapshot, fields)
+    result['debug'] = _stage_breakdown(stages)
+    return result
@@ -0,0 +1,82 @@
+from collections import deque
+from typing import Dict, List
+import math
+import pandas as pd
+
+
+class StreamingSwingDetector:
+    """Detector de swings incremental: recibe una vela cada vez y confirma los swings `period` velas después.
+
+    Mantiene el máximo y el mínimo de la ventana centrada (period*2+1 velas) con deques monótonos,
+    así que cada vela cuesta O(1) amortizado. Los swings confirmados coinciden con los de
+    IntegratedSMCStrategy.detect_swing_points_vectorized sobre las mismas velas. Con `max_swings`
+    solo se conservan (aproximadamente) los últimos swings de cada lista, para feeds sin fin.
+    """
+
+    def __init__(self, period: int = 5, max_swings: int = None):
+        self.period = period
+        self.max_swings = max_swings
+        self.window = period * 2 + 1
+        self.count = 0
+        self.swing_highs: List[Dict] = []
+        self.swing_lows: List[Dict] = []
+        self.all_swings: List[Dict] = []
+        self._candles = deque(maxlen=self.window)
+        self._max_deque = deque()
+        self._min_deque = deque()
+        self._last_nan_high = -1
+        self._last_nan_low = -1
+
+    def update(self, high: float, low: float, time) -> List[Dict]:
+        """Añade una vela y devuelve los swings que quedan confirmados con ella."""
+        index = self.count
+        self.count += 1
+        self._candles.append((high, low, time))
+        if math.isnan(high):
+            self._last_nan_high = index
+        if math.isnan(low):
+            self._last_nan_low = index
+        self._push(self._max_deque, index, high, lambda last, new: last < new)
+        self._push(self._min_deque, index, low, lambda last, new: last > new)
+        if self.count < self.window:
+            return []
+
+        center = index - self.period
+        before_window = index - self.window
+        center_high, center_low, center_time = self._candles[self.period]
+        confirmed = []
+        # Igual que el rolling centrado: un NaN en la ventana anula el swing de esa serie
+        if self._last_nan_high <= before_window and center_high == self._max_deque[0][1]:
+            swing = {'price': center_high, 'time': center_time, 'type': 'high', 'index': center}
+            self.swing_highs.append(swing)
+            confirmed.append(swing)
+        if self._last_nan_low <= before_window and center_low == self._min_deque[0][1]:
+            swing = {'price': center_low, 'time': center_time, 'type': 'low', 'index': center}
+            self.swing_lows.append(swing)
+            confirmed.append(swing)
+        self.all_swings.extend(confirmed)
+        if self.max_swings is not None and len(self.all_swings) > 2 * self.max_swings:
+            self._trim()
+        return confirmed
+
+    def extend(self, df: pd.DataFrame) -> List[Dict]:
+        """Alimenta todas las velas de `df` en orden y devuelve los swings confirmados."""
+        confirmed = []
+        for high, low, time in zip(df['high'].values, df['low'].values, df['date'].values):
+            confirmed.extend(self.update(high, low, time))
+        return confirmed
+
+    def swings(self) -> Dict:
+        return {'swing_highs': self.swing_highs, 'swing_lows': self.swing_lows, 'all_swings': self.all_swings}
+
+    def _trim(self) -> None:
+        # Recorte por lotes para que el coste por vela siga siendo O(1) amortizado
+        for swings in (self.swing_highs, self.swing_lows, self.all_swings):
+            del swings[:-self.max_swings]
+
+    def _push(self, monotonic: deque, index: int, value: float, dominated) -> None:
+        while monotonic and dominated(monotonic[-1][1], value):
+            monotonic.pop()
+        monotonic.append((index, value))
+        if monotonic[0][0] <= index - self.window:
+            monotonic.popleft()
@@ -12,6 +12,13 @@ def fetch_ohlc_data(api_key: str, symbol: str, timeframe: str) -> pd.DataFrame:
     df = pd.DataFrame(data)
     return df
 
+TIMEFRAME_MINUTES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '1hour': 60, '4hour': 240, '1day': 1440}
+
+def timeframe_to_minutes(timeframe: str) -> int:
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"Timeframe no soportado: {timeframe}")
+    return TIMEFRAME_MINUTES[timeframe]
+
 def detect_imbalance(df: pd.DataFrame) -> list:
     return []
 
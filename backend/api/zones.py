@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+# Códigos de origen y tipo; los nombres son los que se exponen en la API
+ORDER_BLOCK, FAIR_VALUE_GAP, LIQUIDITY = 0, 1, 2
+SOURCE_NAMES = np.array(['Order Block', 'Fair Value Gap', 'Liquidity'], dtype=object)
+BULLISH, BEARISH, LOW, HIGH = 0, 1, 2, 3
+TYPE_NAMES = np.array(['bullish', 'bearish', 'low', 'high'], dtype=object)
+
+ZONE_DTYPE = np.dtype([
+    ('source', np.uint8),
+    ('type', np.uint8),
+    ('price', np.float64),
+    ('zone_min', np.float64),
+    ('zone_max', np.float64),
+    ('strength', np.float64),
+    ('freshness', np.float64),
+    ('touches', np.int64),
+    ('is_swept', np.bool_),
+    ('time', np.int64),
+])
+
+
+class ZoneArray:
+    """Zonas de reacción (order blocks, FVGs y niveles de liquidez) en un array estructurado de NumPy.
+
+    Una fila por zona con columnas de tamaño fijo: `price` es el precio de referencia (borde del
+    order block, centro del FVG, precio medio del nivel), `zone_min`/`zone_max` la zona de
+    entrada y `time` la fecha en epoch (ns). Ordenar, filtrar y serializar trabaja por columnas.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Optional[np.ndarray] = None):
+        self.data = data if data is not None else np.empty(0, dtype=ZONE_DTYPE)
+
+    @classmethod
+    def from_columns(cls, source: int, types: np.ndarray, price: np.ndarray, zone_min: np.ndarray, zone_max: np.ndarray,
+                     strength: np.ndarray, freshness: np.ndarray, time: np.ndarray, touches=1, is_swept=False) -> 'ZoneArray':
+        data = np.empty(len(price), dtype=ZONE_DTYPE)
+        data['source'] = source
+        data['type'] = types
+        data['price'] = price
+        data['zone_min'] = zone_min
+        data['zone_max'] = zone_max
+        data['strength'] = strength
+        data['freshness'] = freshness
+        data['touches'] = touches
+        data['is_swept'] = is_swept
+        data['time'] = time
+        return cls(data)
+
+    @classmethod
+    def concat(cls, parts: Iterable['ZoneArray']) -> 'ZoneArray':
+        return cls(np.concatenate([part.data for part in parts]))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data[key]
+        return ZoneArray(np.atleast_1d(self.data[key]))
+
+    def is_buy(self) -> np.ndarray:
+        types = self.data['type']
+        return (types == BULLISH) | (types == LOW)
+
+    def type_names(self) -> np.ndarray:
+        return TYPE_NAMES[self.data['type']]
+
+    def source_names(self) -> np.ndarray:
+        return SOURCE_NAMES[self.data['source']]
+
+    def to_records(self) -> List[Dict]:
+        """Serializa las zonas como diccionarios de tipos nativos, convirtiendo columna a columna."""
+        data = self.data
+        columns = {
+            'source': self.source_names().tolist(),
+            'type': self.type_names().tolist(),
+            'price': data['price'].tolist(),
+            'zone_min': data['zone_min'].tolist(),
+            'zone_max': data['zone_max'].tolist(),
+            'strength': data['strength'].tolist(),
+            'freshness': data['freshness'].tolist(),
+            'touches_count': data['touches'].tolist(),
+            'is_swept': data['is_swept'].tolist(),
+            'time': data['time'].view('datetime64[ns]').astype('datetime64[us]').tolist(),
+        }
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
@@ -0,0 +1,148 @@
+"""Micro-benchmarks de los detectores de IntegratedSMCStrategy sobre velas sintéticas.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_detectors --sizes 200 10000 100000 --output benchmarks/baseline.json
+    python -m benchmarks.bench_detectors --sizes 200 10000 100000 --compare benchmarks/baseline.json
+
+benchmarks/baseline.json guarda esos tamaños (unos 75 s); solo se comparan los casos presentes en el baseline.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+import numpy as np
+import pandas as pd
+import logging
+
+from api.config import TradingConfig
+from api.strategy import IntegratedSMCStrategy
+from benchmarks.synthetic import REGIMES, generate_ohlcv
+
+DEFAULT_SIZES = (200, 1000, 10000, 100000, 1000000)
+
+
+class OfflineStrategy(IntegratedSMCStrategy):
+    """Estrategia sin red: get_market_data y get_current_price sirven las velas sintéticas."""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], config: TradingConfig, clock):
+        super().__init__(api_key=None, config=config, clock=clock)
+        self.frames = frames
+        self.MARKET_DATA_REQUESTS = tuple((timeframe, len(df)) for timeframe, df in frames.items())
+
+    def get_market_data(self, symbol: str, timeframe: str = "1min", limit: int = 200) -> pd.DataFrame:
+        return self.frames[timeframe].tail(limit).reset_index(drop=True)
+
+    def get_current_price(self, symbol: str = "EURUSD") -> Dict:
+        close = float(self.frames['1min']['close'].iloc[-1])
+        return {'ticker': symbol, 'bid': close, 'ask': close}
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    # La memoria se mide en una ejecución aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'best_seconds': min(timings), 'mean_seconds': sum(timings) / len(timings), 'peak_memory_bytes': peak}
+
+
+def bench_case(bars: int, regime: str, repeat: int, seed: int) -> List[Dict]:
+    df_1min = generate_ohlcv(bars, regime, seed)
+    end = df_1min['date'].iloc[-1].to_pydatetime()
+    frames = {'1min': df_1min,
+              '15min': generate_ohlcv(max(bars // 15, 20), regime, seed + 2, end=end, timeframe_minutes=15)}
+    # Reloj fijo en la última vela y frescura sin límite: todos los detectores trabajan sobre la serie completa.
+    # El lookback de sweeps se acota porque la matriz nivel x vela crece con ambos.
+    config = TradingConfig(max_freshness_minutes=10**9, timeframe_sources={'15min': 'fetch'},
+                           sweep_lookback_candles=min(bars, 500))
+    strategy = OfflineStrategy(frames, config, clock=lambda tz=None: end if tz is None else end.replace(tzinfo=tz))
+
+    swings = strategy.detect_swing_points_vectorized(df_1min)
+    liquidity = strategy.find_liquidity_levels(swings['all_swings'])
+    liquidity_arrays = strategy.find_liquidity_level_arrays(swings['all_swings'])
+    sweep_arrays = strategy.detect_liquidity_sweep_arrays(df_1min, liquidity_arrays['price'], liquidity_arrays['is_high'])
+    zones = strategy.collect_zones(df_1min, strategy.detect_order_block_arrays(df_1min),
+                                   strategy.detect_fair_value_gap_arrays(df_1min), liquidity_arrays, sweep_arrays)
+    premium_discount = strategy.calculate_premium_discount_zones(strategy.detect_swing_points_vectorized(frames['15min']))
+    kill_zone = strategy.detect_kill_zones()
+    current_price = float(df_1min['close'].iloc[-1])
+
+    cases = {
+        'detect_swing_points_vectorized': lambda: strategy.detect_swing_points_vectorized(df_1min),
+        'find_liquidity_levels': lambda: strategy.find_liquidity_levels(swings['all_swings']),
+        'detect_liquidity_sweeps': lambda: strategy.detect_liquidity_sweeps(df_1min, liquidity),
+        'detect_order_blocks': lambda: strategy.detect_order_blocks(df_1min),
+        'detect_fair_value_gaps': lambda: strategy.detect_fair_value_gaps(df_1min),
+        'find_reaction_levels': lambda: strategy.find_reaction_levels(zones, current_price, kill_zone, premium_discount),
+        'analyze_symbol': lambda: strategy.analyze_symbol('EURUSD'),
+    }
+    results = []
+    for method, func in cases.items():
+        stats = measure(func, repeat)
+        stats.update(method=method, regime=regime, bars=bars, bars_per_second=bars / stats['best_seconds'])
+        results.append(stats)
+        print(f"{method:32s} {regime:9s} {bars:>8d} bars  {stats['best_seconds'] * 1000:10.2f} ms  "
+              f"{stats['bars_per_second']:>14,.0f} bars/s  {stats['peak_memory_bytes'] / 2**20:8.1f} MiB")
+    return results
+
+
+def compare(results: List[Dict], baseline_path: str, threshold: float) -> List[str]:
+    with open(baseline_path) as f:
+        baseline = {(r['method'], r['regime'], r['bars']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['method'], result['regime'], result['bars']))
+        if previous is None:
+            continue
+        ratio = result['best_seconds'] / previous['best_seconds']
+        if ratio > threshold:
+            regressions.append(f"{result['method']} [{result['regime']}, {result['bars']} bars]: "
+                               f"{previous['best_seconds'] * 1000:.2f} ms -> {result['best_seconds'] * 1000:.2f} ms (x{ratio:.2f})")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de los detectores SMC/ICT")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--regimes', nargs='+', choices=REGIMES, default=list(REGIMES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Ruta del JSON de resultados (baseline)")
+    parser.add_argument('--compare', help="Baseline contra el que comparar los tiempos")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Ratio de tiempo a partir del cual hay regresión")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    results = []
+    for regime in args.regimes:
+        for bars in args.sizes:
+            results.extend(bench_case(bars, regime, args.repeat, args.seed))
+
+    if args.output:
+        report = {'meta': {'created': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                           'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine(),
+                           'seed': args.seed, 'repeat': args.repeat},
+                  'results': results}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Servidor local que imita los endpoints historical-chart/{timeframe}/{symbol} y fx/{symbol} del proveedor.
+
+Sirve velas sintéticas (benchmarks.synthetic) o grabadas, con latencia y errores configurables, y
+cuenta las peticiones recibidas en /stats. Uso (desde backend/):
+    python -m benchmarks.fake_provider --port 8100 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+    PROVIDER_BASE_URL=http://127.0.0.1:8100 uvicorn main:app
+
+Con --recordings DIR se sirven los ficheros DIR/{symbol}_{timeframe}.json (respuestas guardadas del
+proveedor real) cuando existen; el resto de símbolos y timeframes se generan.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+from fastapi import FastAPI, Response
+import pandas as pd
+import uvicorn
+
+from api.utils import timeframe_to_minutes
+from benchmarks.synthetic import REGIMES, generate_ohlcv
+
+
+@dataclass
+class ProviderSettings:
+    bars: int = 3000
+    regime: str = 'trending'
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    hang_rate: float = 0.0
+    hang_seconds: float = 30.0
+    recordings: Optional[str] = None
+    seed: int = 0
+
+
+def _symbol_seed(symbol: str, timeframe: str, seed: int) -> int:
+    # Estable entre procesos (hash() de str no lo es)
+    return zlib.crc32(f"{symbol}:{timeframe}".encode()) + seed
+
+
+def create_app(settings: ProviderSettings) -> FastAPI:
+    app = FastAPI()
+    stats = Counter()
+    rng = random.Random(settings.seed)
+
+    @lru_cache(maxsize=256)
+    def candles(symbol: str, timeframe: str, minute: datetime) -> Tuple[bytes, float]:
+        """(respuesta JSON con las velas de la más reciente a la más antigua, último cierre).
+
+        Las velas sintéticas terminan en la vela en curso y se regeneran al cambiar de minuto.
+        """
+        if settings.recordings:
+            path = os.path.join(settings.recordings, f"{symbol}_{timeframe}.json")
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    payload = f.read()
+                rows = json.loads(payload)
+                return payload, max(rows, key=lambda row: row['date'])['close']
+        minutes = timeframe_to_minutes(timeframe)
+        end = pd.Timestamp(minute).floor(f'{minutes}min').to_pydatetime()
+        df = generate_ohlcv(settings.bars, settings.regime, _symbol_seed(symbol, timeframe, settings.seed), end=end,
+                            timeframe_minutes=minutes)
+        dates = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        rows = [{'date': date, 'open': round(o, 5), 'high': round(h, 5), 'low': round(l, 5), 'close': round(c, 5),
+                 'volume': int(v)}
+                for date, o, h, l, c, v in zip(dates, df['open'], df['high'], df['low'], df['close'], df['volume'])]
+        return json.dumps(rows[::-1]).encode(), rows[-1]['close']
+
+    async def simulate(endpoint: str) -> Optional[Response]:
+        """Latencia y fallos inyectados; devuelve la respuesta de error si toca fallar."""
+        stats[endpoint] += 1
+        delay = max(0.0, settings.latency_ms + rng.uniform(-settings.jitter_ms, settings.jitter_ms)) / 1000
+        if settings.hang_rate and rng.random() < settings.hang_rate:
+            stats[f'{endpoint}_hang'] += 1
+            delay = settings.hang_seconds
+        if delay:
+            await asyncio.sleep(delay)
+        if settings.error_rate and rng.random() < settings.error_rate:
+            stats[f'{endpoint}_error'] += 1
+            return Response(json.dumps({'Error Message': 'Fallo inyectado'}), status_code=settings.error_status,
+                            media_type='application/json')
+        return None
+
+    @app.get("/historical-chart/{timeframe}/{symbol}")
+    async def historical_chart(timeframe: str, symbol: str):
+        error = await simulate('historical_chart')
+        if error is not None:
+            return error
+        minute = datetime.now().replace(second=0, microsecond=0)
+        return Response(candles(symbol.upper(), timeframe, minute)[0], media_type='application/json')
+
+    @app.get("/fx/{symbol}")
+    async def fx(symbol: str):
+        error = await simulate('fx')
+        if error is not None:
+            return error
+        minute = datetime.now().replace(second=0, microsecond=0)
+        close = candles(symbol.upper(), '1min', minute)[1]
+        return [{'ticker': symbol.upper(), 'bid': close, 'ask': round(close + 0.00002, 5), 'open': close, 'low': close,
+                 'high': close, 'changes': 0.0, 'date': minute.strftime('%Y-%m-%d %H:%M:%S')}]
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.clear()
+        return {}
+
+    return app
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Proveedor de datos de mercado falso para pruebas de carga")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--bars', type=int, default=3000, help="Velas por respuesta de historical-chart")
+    parser.add_argument('--regime', choices=REGIMES, default='trending')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Latencia media añadida a cada respuesta")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Variación uniforme (+/-) de la latencia")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fracción de respuestas con error HTTP")
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="Fracción de respuestas que tardan --hang-seconds")
+    parser.add_argument('--hang-seconds', type=float, default=30.0)
+    parser.add_argument('--recordings', help="Directorio con respuestas grabadas {symbol}_{timeframe}.json")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    settings = ProviderSettings(bars=args.bars, regime=args.regime, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                error_rate=args.error_rate, error_status=args.error_status, hang_rate=args.hang_rate,
+                                hang_seconds=args.hang_seconds, recordings=args.recordings, seed=args.seed)
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Prueba de carga de extremo a extremo de POST /analyze contra el proveedor falso.
+
+Lanza peticiones con una concurrencia fija y resume la latencia (p50/p95/p99), el throughput, los
+errores y las llamadas al proveedor por petición (leídas del /stats del proveedor falso). Uso (desde backend/):
+    # Arranca el proveedor falso y la app (uvicorn) y las para al terminar
+    python -m benchmarks.load_test --start --workers 2 --concurrency 32 --requests 2000 --latency-ms 80
+    # Contra servidores ya arrancados
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --provider-url http://127.0.0.1:8100 --duration 60
+
+Con --start la app corre con SCAN_ENABLED=0, sin caché compartida (salvo --shared-cache) y sin límite
+de peticiones al proveedor (salvo --provider-rpm), para que el escáner, los resultados de ejecuciones
+anteriores y el limitador no alteren la medida.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import numpy as np
+import httpx
+
+DEFAULT_SYMBOLS = ('EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD', 'USDCHF', 'NZDUSD', 'EURGBP')
+
+
+async def _provider_stats(client: httpx.AsyncClient, provider_url: Optional[str], reset: bool = False) -> Dict[str, int]:
+    if not provider_url:
+        return {}
+    if reset:
+        await client.post(f"{provider_url}/stats/reset")
+        return {}
+    response = await client.get(f"{provider_url}/stats")
+    return response.json()
+
+
+async def run_load(url: str, symbols: List[str], concurrency: int, total: Optional[int], duration: Optional[float],
+                   confluence: float = 75.0, fields: Optional[str] = None, provider_url: Optional[str] = None,
+                   timeout: float = 60.0) -> Dict:
+    """Mantiene `concurrency` peticiones en vuelo hasta completar `total` o agotar `duration` segundos."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    issued = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, trust_env=False) as client:
+        await _provider_stats(client, provider_url, reset=True)
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        def next_request() -> Optional[int]:
+            nonlocal issued
+            if (total is not None and issued >= total) or (deadline is not None and time.perf_counter() >= deadline):
+                return None
+            issued += 1
+            return issued - 1
+
+        async def worker() -> None:
+            while (number := next_request()) is not None:
+                data = {'symbol': symbols[number % len(symbols)], 'confluence': confluence}
+                if fields:
+                    data['fields'] = fields
+                request_started = time.perf_counter()
+                try:
+                    response = await client.post(f"{url}/analyze", data=data)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - request_started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        provider = await _provider_stats(client, provider_url)
+
+    timings = np.array(latencies) * 1000
+    provider_calls = provider.get('historical_chart', 0) + provider.get('fx', 0)
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {'p50': float(np.percentile(timings, 50)), 'p95': float(np.percentile(timings, 95)),
+                       'p99': float(np.percentile(timings, 99)), 'max': float(timings.max())} if len(timings) else {},
+        'statuses': statuses,
+        'provider_calls': provider,
+        'provider_calls_per_request': provider_calls / len(latencies) if latencies and provider_url else None,
+    }
+
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0, trust_env=False)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"El servidor {url} no respondió en {timeout:.0f}s")
+
+
+@contextmanager
+def _servers(args: argparse.Namespace):
+    """Arranca el proveedor falso y la app como subprocesos y los para al salir."""
+    provider_url = f"http://127.0.0.1:{args.provider_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    provider_cmd = [sys.executable, '-m', 'benchmarks.fake_provider', '--port', str(args.provider_port),
+                    '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+                    '--error-rate', str(args.error_rate), '--bars', str(args.bars)]
+    if args.recordings:
+        provider_cmd += ['--recordings', args.recordings]
+    env = dict(os.environ, PROVIDER_BASE_URL=provider_url, SCAN_ENABLED='0',
+               SHARED_CACHE_URL=args.shared_cache or 'none', PROVIDER_REQUESTS_PER_MINUTE=str(args.provider_rpm))
+    app_cmd = [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(args.app_port), '--workers', str(args.workers),
+               '--log-level', 'warning']
+    processes = [subprocess.Popen(provider_cmd), subprocess.Popen(app_cmd, env=env)]
+    try:
+        _wait_until_up(f"{provider_url}/stats")
+        _wait_until_up(f"{app_url}/")
+        yield app_url, provider_url
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def print_report(report: Dict) -> None:
+    latency = report['latency_ms']
+    print(f"Peticiones:        {report['requests']} (concurrencia {report['concurrency']}, {report['elapsed_seconds']:.1f} s)")
+    print(f"Throughput:        {report['throughput_rps']:.1f} req/s")
+    if latency:
+        print(f"Latencia (ms):     p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  p99 {latency['p99']:.1f}  "
+              f"max {latency['max']:.1f}")
+    print(f"Estados:           {', '.join(f'{status}: {count}' for status, count in sorted(report['statuses'].items()))}")
+    if report['provider_calls_per_request'] is not None:
+        print(f"Proveedor:         {report['provider_calls_per_request']:.2f} llamadas/petición {report['provider_calls']}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de /analyze con el proveedor falso")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="URL de la app (sin --start)")
+    parser.add_argument('--provider-url', help="URL del proveedor falso, para contar sus llamadas (sin --start)")
+    parser.add_argument('--start', action='store_true', help="Arrancar el proveedor falso y la app")
+    parser.add_argument('--workers', type=int, default=1, help="Workers de uvicorn con --start")
+    parser.add_argument('--app-port', type=int, default=8000)
+    parser.add_argument('--provider-port', type=int, default=8100)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--bars', type=int, default=3000)
+    parser.add_argument('--recordings')
+    parser.add_argument('--shared-cache', help="SHARED_CACHE_URL de la app con --start (por defecto none)")
+    parser.add_argument('--provider-rpm', type=float, default=0,
+                        help="PROVIDER_REQUESTS_PER_MINUTE de la app con --start (por defecto 0, sin límite)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, help="Número total de peticiones")
+    parser.add_argument('--duration', type=float, help="Duración en segundos (si no se indica --requests)")
+    parser.add_argument('--symbols', nargs='+', default=list(DEFAULT_SYMBOLS))
+    parser.add_argument('--confluence', type=float, default=75.0)
+    parser.add_argument('--fields', help="Campos pedidos a /analyze, separados por comas")
+    parser.add_argument('--output', help="Ruta del JSON con el informe")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 500
+
+    def run(url: str, provider_url: Optional[str]) -> Dict:
+        return asyncio.run(run_load(url, args.symbols, args.concurrency, args.requests, args.duration,
+                                    args.confluence, args.fields, provider_url))
+
+    if args.start:
+        with _servers(args) as (url, provider_url):
+            report = run(url, provider_url)
+    else:
+        report = run(args.url, args.provider_url)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Informe guardado en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
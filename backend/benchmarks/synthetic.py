@@ -0,0 +1,53 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+REGIMES = ('trending', 'ranging', 'gappy')
+
+
+def generate_ohlcv(bars: int, regime: str = 'trending', seed: int = 0, end: datetime = None,
+                   timeframe_minutes: int = 1, start_price: float = 1.1, pip: float = 0.0001) -> pd.DataFrame:
+    """Genera velas OHLCV sintéticas y reproducibles (misma semilla, mismas velas).
+
+    - trending: paseo aleatorio con deriva que cambia de signo cada pocos miles de velas.
+    - ranging: proceso que revierte a la media alrededor de `start_price`.
+    - gappy: paseo aleatorio con huecos de precio entre velas y velas ausentes (fines de semana, noticias).
+    """
+    if regime not in REGIMES:
+        raise ValueError(f"Régimen no soportado: {regime}")
+    rng = np.random.default_rng(seed)
+    volatility = 0.8 * pip * np.sqrt(timeframe_minutes)
+    shocks = rng.normal(0, volatility, bars)
+    if regime == 'trending':
+        drift = np.repeat(rng.choice([-1.0, 1.0], size=bars // 3000 + 1), 3000)[:bars] * 0.1 * volatility
+        closes = start_price + np.cumsum(shocks + drift)
+    elif regime == 'ranging':
+        closes = np.empty(bars)
+        level, reversion = start_price, 0.02
+        for i in range(bars):
+            level += reversion * (start_price - level) + shocks[i]
+            closes[i] = level
+    else:
+        gaps = rng.random(bars) < 0.002
+        closes = start_price + np.cumsum(shocks + gaps * rng.normal(0, 30 * pip, bars))
+
+    opens = np.empty(bars)
+    opens[0] = start_price
+    opens[1:] = closes[:-1]
+    if regime == 'gappy':
+        # El precio de apertura salta respecto al cierre anterior en las velas con hueco
+        opens[1:] += (rng.random(bars - 1) < 0.01) * rng.normal(0, 5 * pip, bars - 1)
+    wick = np.abs(rng.normal(0, volatility / 2, (2, bars)))
+    highs = np.maximum(opens, closes) + wick[0]
+    lows = np.minimum(opens, closes) - wick[1]
+    volume = rng.integers(50, 5000, bars)
+
+    step = np.ones(bars, dtype=np.int64) * timeframe_minutes
+    if regime == 'gappy':
+        step[rng.random(bars) < 0.001] += 60 * 48
+    step[0] = 0
+    offsets = np.cumsum(step)
+    end = (end or datetime.now()).replace(second=0, microsecond=0)
+    dates = np.datetime64(end, 'm') - (offsets[-1] - offsets).astype('timedelta64[m]')
+    return pd.DataFrame({'date': dates.astype('datetime64[ns]'), 'open': opens, 'high': highs, 'low': lows,
+                         'close': closes, 'volume': volume})
@@ -1,25 +1,32 @@
-✅ Paso 3 completo y corregido:
-Te paso el main.py actualizado completo, con:
-
-✅ Caché con fastapi-cache2
-✅ Sin cambiar tu lógica actual (IntegratedSMCStrategy)
-✅ Compatible con Render (gunicorn + $PORT)
-✅ Sin timeout gracias a caché
-✅ main.py (versión final recomendada para Render)
-python
-
-from fastapi import FastAPI, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Form, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
-from fastapi_cache.decorator import cache
-from api.strategy import IntegratedSMCStrategy
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from api.strategy import IntegratedSMCStrategy, analyze_market_snapshot
+from api.pipeline import normalize_fields
 from api.config import TradingConfig
+from api.cache import AnalysisCache
+from api.shared_cache import create_shared_cache
+from api.live import LiveHub, ProviderCandleFeed
+from api.scanner import MarketScanner, ScanStore
+from api.rate_limit import create_rate_limiter
+from api.metrics import REGISTRY, REQUEST_SECONDS, observe_stages
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import httpx
+import numpy as np
+import asyncio
+import json
 import logging
 import os
+import tempfile
+import time
 
 app = FastAPI()
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# httpx registra cada petición en INFO con su URL completa, que incluye la API key del proveedor
+logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 # Configurar CORS
@@ -31,10 +38,105 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inicializar caché al arrancar
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # La plantilla de la ruta (no la URL) evita una serie por cada símbolo; las URLs sin ruta (404) comparten una
+    route = request.scope.get("route")
+    path = route.path if route is not None else "<unmatched>"
+    REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, path=path, status=response.status_code)
+    return response
+
+# Pool de procesos para los detectores del endpoint batch y del escáner. Cada worker de uvicorn crea el
+# suyo, así que por defecto se reparten los núcleos entre los WEB_CONCURRENCY workers (PROCESS_POOL_SIZE lo fija)
+process_pool = None
+
+def process_pool_size() -> int:
+    configured = int(os.getenv("PROCESS_POOL_SIZE", 0))
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 1) // max(int(os.getenv("WEB_CONCURRENCY", 1)), 1))
+
+# Cliente HTTP compartido con el proveedor: conexiones keep-alive reutilizadas entre peticiones
+http_client = None
+
+# Caché compartida por todos los workers del host (SHARED_CACHE_URL: sqlite:///ruta, redis://..., none)
+shared_cache = create_shared_cache(os.getenv(
+    "SHARED_CACHE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'smc-shared-cache.sqlite3')}"
+))
+
+# Un solo límite de peticiones al proveedor para todas las descargas de todos los workers (0 = sin límite)
+provider_rate_limiter = create_rate_limiter(
+    float(os.getenv("PROVIDER_REQUESTS_PER_MINUTE", TradingConfig.provider_requests_per_minute)), shared_cache
+)
+
+# Resultados por (símbolo, timeframe, configuración); caducan al cerrar la vela de 1min en curso
+analysis_cache = AnalysisCache(maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", 512)), shared=shared_cache)
+
+def build_config(confluence: float) -> TradingConfig:
+    return TradingConfig(
+        risk_per_trade=0.02,
+        min_confluence_score=confluence,
+        preferred_pairs=['EURUSD', 'GBPUSD', 'USDJPY'],
+        trading_sessions=['London', 'New York'],
+        candle_store_path=os.getenv("CANDLE_STORE_PATH"),
+        provider_base_url=os.getenv("PROVIDER_BASE_URL", TradingConfig.provider_base_url),
+        scan_universe=[s.strip().upper() for s in os.getenv("SCAN_UNIVERSE", "").split(",") if s.strip()] or None
+    )
+
+@lru_cache(maxsize=32)
+def get_strategy(confluence: float) -> IntegratedSMCStrategy:
+    """Estrategia reutilizable por configuración (la configuración solo varía con la confluencia)."""
+    api_key = os.getenv("API_KEY", "1OFGTIDh9osWhsdERKSn6lL7Q9lUgeNH")
+    return IntegratedSMCStrategy(api_key=api_key, config=build_config(confluence), http_client=http_client,
+                                 shared_cache=shared_cache, rate_limiter=provider_rate_limiter)
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Campos pedidos como lista separada por comas (todos si no se indica ninguno)."""
+    try:
+        return normalize_fields([field.strip() for field in (fields or "").split(",") if field.strip()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def encode_result(result: dict) -> str:
+    # Los detectores devuelven tipos de numpy que el encoder por defecto no conoce
+    return json.dumps(jsonable_encoder(result, custom_encoder={np.datetime64: str, np.generic: lambda value: value.item()}))
+
+# Un estado en vivo por símbolo compartido por todos los suscriptores de /live
+live_hub = LiveHub(ProviderCandleFeed(), encode_result, poll_interval=float(os.getenv("LIVE_POLL_SECONDS", 5)))
+
+# Ranking precalculado por el escáner en segundo plano, publicado en la caché compartida. Consume cuota
+# del proveedor y CPU en cada vela, así que solo se activa con SCAN_ENABLED=1; con la caché compartida
+# los workers se turnan para escanear, sin ella cada worker escanea por su cuenta
+scan_store = ScanStore(shared=shared_cache)
+scanner = None
+
+# Inicializar el cliente HTTP, el pool de procesos y el escáner al arrancar
 @app.on_event("startup")
 async def startup():
-    FastAPICache.init(InMemoryBackend())
+    global process_pool, http_client, scanner
+    http_client = httpx.AsyncClient(
+        timeout=15,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+        trust_env=False
+    )
+    process_pool = ProcessPoolExecutor(max_workers=process_pool_size())
+    if os.getenv("SCAN_ENABLED", "0") == "1":
+        scanner = MarketScanner(get_strategy(75.0), scan_store, executor=process_pool, shared_cache=shared_cache)
+        scanner.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if scanner is not None:
+        await scanner.stop()
+    await live_hub.close()
+    # Las estrategias cacheadas guardan una referencia al cliente que se va a cerrar
+    get_strategy.cache_clear()
+    if http_client is not None:
+        await http_client.aclose()
+    if process_pool is not None:
+        process_pool.shutdown(wait=False, cancel_futures=True)
 
 # Ruta principal
 @app.get("/")
@@ -46,31 +148,111 @@ async def root():
 async def test():
     return {"message": "Test endpoint is working"}
 
+# Métricas en formato Prometheus
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Ruta de análisis con caché
 @app.post("/analyze")
-@cache(expire=3600)  # Cache por 1 hora
 async def analyze_symbol(
     symbol: str = Form(...),
     timeframe: str = Form("1h"),
-    confluence: float = Form(75.0)
+    confluence: float = Form(75.0),
+    debug: bool = Form(False),
+    fields: Optional[str] = Form(None)
 ):
-    try:
-        config = TradingConfig(
-            risk_per_trade=0.02,
-            min_confluence_score=confluence,
-            preferred_pairs=['EURUSD', 'GBPUSD', 'USDJPY'],
-            trading_sessions=['London', 'New York']
-        )
-        api_key = os.getenv("API_KEY", "1OFGTIDh9osWhsdERKSn6lL7Q9lUgeNH")
-        strategy = IntegratedSMCStrategy(api_key=api_key, config=config)
-        result = strategy.analyze_symbol(symbol.upper())
+    strategy = get_strategy(confluence)
+    symbol = symbol.upper()
+    # Solo se descargan y calculan las etapas de las que dependen los campos pedidos
+    requested = parse_fields(fields)
+
+    async def compute() -> dict:
+        result = await strategy.analyze_symbol_async(symbol, debug, requested)
         if 'error' in result:
             raise HTTPException(status_code=400, detail=result['error'])
         return result
+
+    try:
+        # Con debug se quiere el desglose de tiempos de esta petición, no el de un resultado cacheado
+        if debug:
+            return await compute()
+        return await analysis_cache.get_or_compute((symbol, timeframe, requested, strategy.config.cache_key()), compute)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analizando símbolo: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+# Análisis de varios símbolos: descarga concurrente, detectores en el pool de procesos
+# y resultados enviados (NDJSON) a medida que termina cada símbolo
+@app.post("/analyze/batch")
+async def analyze_batch(
+    symbols: List[str] = Form(...),
+    confluence: float = Form(75.0),
+    debug: bool = Form(False),
+    fields: Optional[str] = Form(None)
+):
+    symbol_list = list(dict.fromkeys(s.strip().upper() for item in symbols for s in item.split(',') if s.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No se recibieron símbolos")
+    requested = parse_fields(fields)
+    strategy = get_strategy(confluence)
+    timeframes, quote = strategy.required_inputs(requested)
+    loop = asyncio.get_running_loop()
+
+    async def analyze_one(symbol: str) -> dict:
+        try:
+            snapshot = await strategy.fetch_market_snapshot_async(symbol, timeframes, quote)
+            result = await loop.run_in_executor(process_pool, analyze_market_snapshot, strategy.config, symbol, snapshot,
+                                                requested)
+            breakdown = result.pop('debug')
+            observe_stages(breakdown['stages_ms'])
+            if debug:
+                result['debug'] = breakdown
+            if 'error' in result:
+                return {'symbol': symbol, 'error': result['error']}
+            return {'symbol': symbol, 'result': result}
+        except Exception as e:
+            logger.error(f"Error analizando {symbol} en batch: {str(e)}")
+            return {'symbol': symbol, 'error': 'Error interno del servidor'}
+
+    async def stream_results():
+        tasks = [asyncio.create_task(analyze_one(symbol)) for symbol in symbol_list]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield encode_result(await finished) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# Ranking de símbolos por mejor confluencia, leído del último escaneo (sin descargas ni cálculo)
+@app.get("/scan")
+async def scan(limit: int = 50):
+    snapshot = await asyncio.to_thread(scan_store.snapshot, limit)
+    return Response(encode_result(snapshot), media_type="application/json")
+
+# Análisis en vivo (Server-Sent Events): un evento por cada vela nueva de 1min
+@app.get("/live/{symbol}")
+async def live_symbol(request: Request, symbol: str, confluence: float = 75.0):
+    strategy = get_strategy(confluence)
+
+    async def events():
+        async with live_hub.subscribe(symbol.upper(), strategy) as updates:
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(updates.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comentario SSE para que proxies y navegadores no cierren la conexión
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: analysis\ndata: {payload}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Solo para pruebas locales
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,48 @@
+"""Fixtures comunes: velas sintéticas reproducibles y una estrategia con el reloj fijado en la última vela.
+
+Ejecutar desde backend/:
+    python -m pytest -q tests
+"""
+from datetime import datetime
+import logging
+import pytest
+
+from api.config import TradingConfig
+from api.strategy import IntegratedSMCStrategy
+from benchmarks.synthetic import REGIMES, generate_ohlcv
+
+logging.disable(logging.INFO)
+
+END = datetime(2026, 3, 4, 9, 30)
+SEEDS = (1, 2, 3)
+# Frescura por defecto y sin límite (todos los detectores trabajan sobre la serie completa)
+FRESHNESS = (120, 10**9)
+
+
+def make_strategy(df, **config) -> IntegratedSMCStrategy:
+    end = df['date'].iloc[-1].to_pydatetime()
+    return IntegratedSMCStrategy(api_key=None, config=TradingConfig(**config),
+                                 clock=lambda tz=None: end if tz is None else end.replace(tzinfo=tz))
+
+
+@pytest.fixture(params=[(regime, seed) for regime in REGIMES for seed in SEEDS], ids=lambda p: f'{p[0]}-{p[1]}')
+def candles(request):
+    regime, seed = request.param
+    return generate_ohlcv(600, regime, seed, end=END)
+
+
+@pytest.fixture(params=FRESHNESS, ids=lambda f: f'fresh{f}')
+def strategy(request, candles):
+    return make_strategy(candles, max_freshness_minutes=request.param)
+
+
+def assert_records_equal(actual, expected):
+    """Mismos registros en el mismo orden; los floats se comparan con tolerancia de redondeo."""
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert set(got) == set(want)
+        for key, value in want.items():
+            if isinstance(value, float):
+                assert got[key] == pytest.approx(value, rel=1e-12, abs=1e-12), key
+            else:
+                assert got[key] == value, key
@@ -0,0 +1,140 @@
+"""Implementaciones originales (bucles fila a fila) que sirven de referencia a las versiones vectorizadas.
+
+Copiadas de IntegratedSMCStrategy antes de vectorizar; solo cambia datetime.now() por el reloj de la estrategia.
+"""
+from typing import Dict, List
+import pandas as pd
+
+
+def detect_order_blocks(strategy, df: pd.DataFrame) -> List[Dict]:
+    order_blocks = []
+    if len(df) < 3: return order_blocks
+    current_time = strategy.clock()
+    for i in range(1, len(df) - 1):
+        current_candle, next_candle = df.iloc[i], df.iloc[i+1]
+        if not all(isinstance(current_candle[col], (int, float)) for col in ['open', 'high', 'low', 'close']): continue
+        ob_size = abs(current_candle['open'] - current_candle['close']) * strategy.PRICE_MULTIPLIER
+        if current_candle['close'] < current_candle['open'] and next_candle['close'] > current_candle['high']:
+            if ob_size >= 2 or abs(next_candle['close'] - current_candle['high']) * strategy.PRICE_MULTIPLIER >= 3:
+                freshness = (current_time - pd.to_datetime(current_candle['date'])).total_seconds() / 60
+                if freshness <= strategy.config.max_freshness_minutes:
+                    order_blocks.append({'type': 'bullish', 'price': current_candle['low'], 'zone_min': current_candle['low'], 'zone_max': current_candle['open'], 'time': current_candle['date'], 'size_pips': ob_size, 'freshness': freshness, 'validated_by_sweep': False, 'strength': min(ob_size * 5, 100)})
+        elif current_candle['close'] > current_candle['open'] and next_candle['close'] < current_candle['low']:
+            if ob_size >= 2 or abs(current_candle['low'] - next_candle['close']) * strategy.PRICE_MULTIPLIER >= 3:
+                freshness = (current_time - pd.to_datetime(current_candle['date'])).total_seconds() / 60
+                if freshness <= strategy.config.max_freshness_minutes:
+                    order_blocks.append({'type': 'bearish', 'price': current_candle['high'], 'zone_min': current_candle['close'], 'zone_max': current_candle['high'], 'time': current_candle['date'], 'size_pips': ob_size, 'freshness': freshness, 'validated_by_sweep': False, 'strength': min(ob_size * 5, 100)})
+    return sorted(order_blocks, key=lambda x: (x['strength'], -x['freshness']), reverse=True)
+
+
+def detect_fair_value_gaps(strategy, df: pd.DataFrame) -> List[Dict]:
+    fvg_zones = []
+    if len(df) < 3: return fvg_zones
+    current_time = strategy.clock()
+    for i in range(2, len(df)):
+        candle1, candle3 = df.iloc[i-2], df.iloc[i]
+        time = df.iloc[i-1]['date']
+        freshness = (current_time - pd.to_datetime(time)).total_seconds() / 60
+        if freshness > strategy.config.max_freshness_minutes: continue
+        if candle1['low'] > candle3['high']:
+            gap_size = (candle1['low'] - candle3['high']) * strategy.PRICE_MULTIPLIER
+            fvg_zones.append({'type': 'bullish', 'zone_min': candle3['high'], 'zone_max': candle1['low'], 'time': time, 'freshness': freshness, 'gap_size_pips': gap_size, 'strength': min(gap_size * 10, 100)})
+        elif candle1['high'] < candle3['low']:
+            gap_size = (candle3['low'] - candle1['high']) * strategy.PRICE_MULTIPLIER
+            fvg_zones.append({'type': 'bearish', 'zone_min': candle1['high'], 'zone_max': candle3['low'], 'time': time, 'freshness': freshness, 'gap_size_pips': gap_size, 'strength': min(gap_size * 10, 100)})
+    return sorted(fvg_zones, key=lambda x: (x['strength'], -x['freshness']), reverse=True)
+
+
+def find_liquidity_levels(strategy, all_swings: List[Dict]) -> List[Dict]:
+    if not all_swings: return []
+    grouped_levels = {}
+    tolerance = strategy.config.liquidity_tolerance
+    current_time = strategy.clock()
+    for swing in all_swings:
+        matched = False
+        for level_price_key in list(grouped_levels.keys()):
+            if abs(swing['price'] - level_price_key) < tolerance:
+                level_data = grouped_levels[level_price_key]
+                level_data['touches'].append(swing)
+                level_data['sum_price'] += swing['price']
+                level_data['count'] += 1
+                level_data['avg_price'] = level_data['sum_price'] / level_data['count']
+                latest_touch_time = max([pd.to_datetime(t['time']) for t in level_data['touches']])
+                level_data['freshness'] = (current_time - latest_touch_time).total_seconds() / 60
+                matched = True
+                break
+        if not matched:
+            swing_time = pd.to_datetime(swing['time'])
+            freshness = (current_time - swing_time).total_seconds() / 60
+            grouped_levels[swing['price']] = {
+                'avg_price': swing['price'], 'touches': [swing], 'count': 1, 'sum_price': swing['price'],
+                'freshness': freshness, 'is_swept': False, 'strength': 1
+            }
+    liquidity_levels = []
+    for _, data in grouped_levels.items():
+        high_touches = sum(1 for t in data['touches'] if t['type'] == 'high')
+        level_type = 'high' if high_touches >= len(data['touches']) / 2 else 'low'
+        strength = min(data['count'] * 10, 100)
+        liquidity_levels.append({
+            'price': data['avg_price'], 'type': level_type, 'touches_count': data['count'],
+            'strength': strength, 'freshness': data['freshness'],
+            'last_touch_time': max([t['time'] for t in data['touches']]), 'is_swept': data['is_swept']
+        })
+    fresh_levels = [lvl for lvl in liquidity_levels if lvl['freshness'] <= strategy.config.max_freshness_minutes]
+    return sorted(fresh_levels, key=lambda x: (x['strength'], -x['freshness']), reverse=True)
+
+
+def detect_liquidity_sweeps(strategy, df: pd.DataFrame, liquidity_levels: List[Dict]) -> List[Dict]:
+    if len(df) < 2 or not liquidity_levels: return []
+    current_time = strategy.clock()
+    sweeps = []
+    for level in liquidity_levels:
+        for i in range(len(df) - 1, max(-1, len(df) - 20), -1):
+            candle = df.iloc[i]
+            if (level['type'] == 'low' and candle['low'] < level['price'] and candle['close'] > level['price']) or \
+               (level['type'] == 'high' and candle['high'] > level['price'] and candle['close'] < level['price']):
+                sweep_freshness = (current_time - pd.to_datetime(candle['date'])).total_seconds() / 60
+                if sweep_freshness < strategy.config.max_freshness_minutes:
+                    level['is_swept'] = True
+                    sweeps.append({'type': 'bullish_sweep' if level['type'] == 'low' else 'bearish_sweep',
+                                   'level_price': level['price'], 'time': candle['date'], 'freshness': sweep_freshness})
+                    break
+    return sorted(sweeps, key=lambda x: x['freshness'])
+
+
+def calculate_confluence_score(level: Dict, context: Dict) -> int:
+    score = 40
+
+    kill_zone = context.get('kill_zone')
+    if kill_zone and kill_zone.is_active:
+        if kill_zone.priority == 'high': score += 30
+        elif kill_zone.priority == 'medium': score += 20
+
+    pd_zones = context.get('premium_discount_zones')
+    current_price = context.get('current_price', 0)
+    if pd_zones and pd_zones.equilibrium:
+        is_bullish_buy = level.get('type') in ['bullish', 'low']
+        is_bearish_sell = level.get('type') in ['bearish', 'high']
+        is_in_discount = current_price <= pd_zones.discount_end
+        is_in_premium = current_price >= pd_zones.premium_start
+        if (is_bullish_buy and is_in_discount) or (is_bearish_sell and is_in_premium):
+            score += 25
+
+    touches = level.get('touches_count', 1)
+    if touches >= 3: score += 20
+    elif touches >= 2: score += 10
+
+    freshness = level.get('freshness', 999)
+    if freshness <= 15: score += 15
+    elif freshness <= 30: score += 10
+    elif freshness <= 60: score += 5
+
+    strength = level.get('strength', 0)
+    if strength >= 80: score += 10
+    elif strength >= 60: score += 7
+    elif strength >= 40: score += 5
+
+    if level.get('is_swept', False) and level.get('source') != 'Liquidity':
+        score += 10
+
+    return min(score, 100)
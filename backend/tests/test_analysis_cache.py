@@ -0,0 +1,141 @@
+"""Caché de resultados: single-flight, LRU y caducidad al cierre de vela con un reloj inyectado."""
+import asyncio
+import time
+import pytest
+
+from api.cache import AnalysisCache, next_candle_close
+from api.shared_cache import MemoryCache
+
+START = 1_772_616_600.0  # 2026-03-04 09:30:00 UTC, justo al abrir una vela de 1min
+
+
+class FakeClock:
+    def __init__(self, now: float = START):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def counting(value):
+    calls = []
+
+    async def compute():
+        calls.append(value)
+        await asyncio.sleep(0)
+        return value
+    return compute, calls
+
+
+def test_next_candle_close():
+    assert next_candle_close(START) == START + 60
+    assert next_candle_close(START + 59.9) == START + 60
+    assert next_candle_close(START + 60) == START + 120
+    assert next_candle_close(START + 600, candle_minutes=15) == START + 15 * 60
+
+
+def test_concurrent_misses_share_one_compute():
+    async def scenario():
+        cache = AnalysisCache(clock=FakeClock())
+        started, release = asyncio.Event(), asyncio.Event()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return {'symbol': 'EURUSD'}
+
+        waiters = [asyncio.ensure_future(cache.get_or_compute('EURUSD', compute)) for _ in range(5)]
+        await started.wait()
+        release.set()
+        return calls, await asyncio.gather(*waiters), cache
+
+    calls, results, cache = asyncio.run(scenario())
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert len(cache) == 1
+
+
+def test_compute_survives_cancelled_caller():
+    async def scenario():
+        cache = AnalysisCache(clock=FakeClock())
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return 'done'
+
+        first = asyncio.ensure_future(cache.get_or_compute('k', compute))
+        second = asyncio.ensure_future(cache.get_or_compute('k', compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second, cache.get('k')
+
+    assert asyncio.run(scenario()) == ('done', 'done')
+
+
+def test_hits_until_the_candle_closes():
+    clock = FakeClock(START + 30)
+    cache = AnalysisCache(clock=clock)
+    compute, calls = counting('v1')
+    assert asyncio.run(cache.get_or_compute('k', compute)) == 'v1'
+    clock.now = START + 59.999
+    assert asyncio.run(cache.get_or_compute('k', compute)) == 'v1'
+    assert calls == ['v1']
+    clock.now = START + 60
+    assert cache.get('k') is None
+    assert len(cache) == 0
+    assert asyncio.run(cache.get_or_compute('k', compute)) == 'v1'
+    assert calls == ['v1', 'v1']
+
+
+def test_expiry_follows_candle_minutes():
+    clock = FakeClock(START)
+    cache = AnalysisCache(clock=clock, candle_minutes=15)
+    cache.set('k', 'v')
+    clock.now = next_candle_close(START, 15) - 1
+    assert cache.get('k') == 'v'
+    clock.now += 1
+    assert cache.get('k') is None
+
+
+def test_lru_eviction():
+    cache = AnalysisCache(maxsize=2, clock=FakeClock())
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' pasa a ser la más reciente
+    cache.set('c', 3)
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_errors_are_not_cached():
+    cache = AnalysisCache(clock=FakeClock())
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        raise RuntimeError('proveedor caído')
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(cache.get_or_compute('k', failing))
+    assert len(attempts) == 2
+    assert len(cache) == 0
+    compute, calls = counting('ok')
+    assert asyncio.run(cache.get_or_compute('k', compute)) == 'ok'
+
+
+def test_shared_tier_is_checked_before_computing():
+    # MemoryCache caduca con el reloj real: la caché local usa la hora actual
+    shared = MemoryCache()
+    first = AnalysisCache(clock=time.time, shared=shared)
+    second = AnalysisCache(clock=time.time, shared=shared)
+    compute, calls = counting({'recommendation': 'HOLD'})
+    assert asyncio.run(first.get_or_compute(('EURUSD', 'cfg'), compute)) == {'recommendation': 'HOLD'}
+    assert asyncio.run(second.get_or_compute(('EURUSD', 'cfg'), compute)) == {'recommendation': 'HOLD'}
+    assert len(calls) == 1
@@ -0,0 +1,92 @@
+"""Selección de campos en /analyze: solo los campos pedidos, solo los nodos necesarios y 400 si un campo no existe."""
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+# Sin caché compartida: cada prueba calcula su resultado (se lee al importar main)
+os.environ.setdefault("SHARED_CACHE_URL", "none")
+
+import main
+from api import pipeline
+from api.cache import AnalysisCache
+from api.pipeline import OUTPUT_FIELDS
+from api.resample import resample_ohlcv
+from tests.conftest import END, make_strategy
+from benchmarks.synthetic import generate_ohlcv
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Cliente de la app con una estrategia que sirve velas sintéticas y apunta descargas y nodos calculados."""
+    candles = generate_ohlcv(600, 'trending', 1, end=END)
+    strategy = make_strategy(candles)
+    calls = {'fetches': [], 'nodes': []}
+
+    async def fetch_market_snapshot_async(symbol, timeframes=None, quote=True):
+        calls['fetches'].append((tuple(timeframes), quote))
+        frames = {'1min': candles, '15min': resample_ohlcv(candles, 15)}
+        return strategy._build_snapshot({timeframe: frames[timeframe] for timeframe in timeframes},
+                                        {'ticker': symbol, 'ask': float(candles['close'].iloc[-1])} if quote else {}, timeframes)
+
+    def spy(name, compute):
+        def wrapped(*args):
+            calls['nodes'].append(name)
+            return compute(*args)
+        return wrapped
+
+    strategy.fetch_market_snapshot_async = fetch_market_snapshot_async
+    monkeypatch.setattr(pipeline, 'NODES', {name: (deps, stage, spy(name, compute))
+                                            for name, (deps, stage, compute) in pipeline.NODES.items()})
+    monkeypatch.setattr(main, 'get_strategy', lambda confluence: strategy)
+    monkeypatch.setattr(main, 'analysis_cache', AnalysisCache())
+    return TestClient(main.app), calls
+
+
+def test_all_fields_by_default(app):
+    client, calls = app
+    response = client.post('/analyze', data={'symbol': 'eurusd'})
+    assert response.status_code == 200
+    assert tuple(response.json()) == OUTPUT_FIELDS
+    assert response.json()['symbol'] == 'EURUSD'
+    assert calls['fetches'] == [(('1min', '15min'), True)]
+    assert sorted(calls['nodes']) == sorted(pipeline.NODES)
+
+
+def test_only_requested_fields_are_returned(app):
+    client, calls = app
+    response = client.post('/analyze', data={'symbol': 'EURUSD', 'fields': ' recommendation, symbol ,current_price'})
+    assert response.status_code == 200
+    assert tuple(response.json()) == ('symbol', 'current_price', 'recommendation')
+    # Cada nodo del que dependen los campos se calcula una vez; closest_elements no se calcula
+    assert sorted(calls['nodes']) == sorted(pipeline.dependencies(('symbol', 'current_price', 'recommendation'))
+                                            .intersection(pipeline.NODES))
+    assert 'closest_elements' not in calls['nodes']
+
+
+@pytest.mark.parametrize('field, fetches, nodes', [
+    ('premium_discount_zones', [(('15min',), False)], ['swings_15min', 'premium_discount_zones']),
+    ('structure_1min', [(('1min',), False)], ['swings_1min', 'structure_1min']),
+    ('analysis_time', [((), False)], ['analysis_time']),
+])
+def test_only_needed_nodes_are_evaluated(app, field, fetches, nodes):
+    client, calls = app
+    response = client.post('/analyze', data={'symbol': 'EURUSD', 'fields': field})
+    assert response.status_code == 200
+    assert tuple(response.json()) == (field,)
+    assert calls['fetches'] == fetches
+    assert calls['nodes'] == nodes
+
+
+def test_unknown_field_is_rejected(app):
+    client, calls = app
+    response = client.post('/analyze', data={'symbol': 'EURUSD', 'fields': 'symbol,precio,zonas'})
+    assert response.status_code == 400
+    assert 'precio' in response.json()['detail'] and 'zonas' in response.json()['detail']
+    assert calls['fetches'] == [] and calls['nodes'] == []
+
+
+def test_batch_rejects_unknown_field(app):
+    client, calls = app
+    response = client.post('/analyze/batch', data={'symbols': 'EURUSD', 'fields': 'precio'})
+    assert response.status_code == 400
+    assert calls['fetches'] == []
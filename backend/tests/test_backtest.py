@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+
+from api.backtest import BacktestEngine
+
+START = datetime(2026, 3, 4, 8, 0)
+PIP = 0.00001
+
+
+class ScriptedEngine(BacktestEngine):
+    """Backtest con las señales fijadas a mano: {índice de vela: (acción, borde de la entry zone)}."""
+
+    def __init__(self, signals, **options):
+        super().__init__(window=1, stop_pips=10, take_profit_pips=20, **options)
+        self.signals = {START + timedelta(minutes=i): signal for i, signal in signals.items()}
+
+    def _analyze_bar(self, window_df, all_swings, premium_discount, current_price):
+        signal = self.signals.get(self.clock.current)
+        if signal is None:
+            return None, {'action': 'HOLD'}
+        action, entry = signal
+        level = {'action': action, 'source': 'Order Block', 'entry_zone_max': entry, 'entry_zone_min': entry}
+        return level, {'action': action, 'confidence': 80}
+
+
+def _candles(rows):
+    """Velas (open, high, low, close) de 1min a partir de START."""
+    return pd.DataFrame([{'date': START + timedelta(minutes=i), 'open': o, 'high': h, 'low': l, 'close': c, 'volume': 100}
+                         for i, (o, h, l, c) in enumerate(rows)])
+
+
+def _closed(report):
+    return [t for t in report['trade_log'] if t['outcome'] in ('WIN', 'LOSS')]
+
+
+def test_limit_through_the_open_fills_at_the_open():
+    # Compra límite en 1.10000 y la vela siguiente abre por debajo: se ejecuta a 1.09995, con el stop
+    # en 1.09985 y el objetivo en 1.10015
+    report = ScriptedEngine({0: ('BUY', 1.10000)}).run(_candles([
+        (1.10010, 1.10012, 1.10005, 1.10008),
+        (1.09995, 1.09998, 1.09992, 1.09996),
+        (1.09996, 1.10025, 1.09994, 1.10022),
+    ]))
+    trade, = _closed(report)
+    assert trade['entry_price'] == 1.09995
+    assert (trade['stop_price'], trade['target_price'], trade['exit_price']) == pytest.approx((1.09985, 1.10015, 1.10015))
+    assert trade['outcome'] == 'WIN' and trade['pnl_pips'] == pytest.approx(20)
+
+
+def test_sell_limit_through_the_open_fills_at_the_open():
+    report = ScriptedEngine({0: ('SELL', 1.10000)}).run(_candles([
+        (1.09990, 1.09995, 1.09985, 1.09990),
+        (1.10004, 1.10008, 1.10001, 1.10006),
+        (1.10006, 1.10020, 1.10002, 1.10015),   # toca el stop, 10 pips por encima de la ejecución
+    ]))
+    trade, = _closed(report)
+    assert trade['entry_price'] == 1.10004 and trade['exit_price'] == pytest.approx(1.10014)
+    assert trade['outcome'] == 'LOSS' and trade['pnl_pips'] == pytest.approx(-10)
+
+
+FILL_BAR_HITS_BOTH = [
+    (1.10010, 1.10012, 1.10005, 1.10008),
+    (1.10005, 1.10025, 1.09985, 1.10020),   # entra en 1.10000 y toca stop (1.09990) y objetivo (1.10020)
+    (1.10020, 1.10030, 1.10015, 1.10025),   # solo toca el objetivo
+]
+
+
+def test_exits_start_on_the_bar_after_the_fill():
+    trade, = _closed(ScriptedEngine({0: ('BUY', 1.10000)}).run(_candles(FILL_BAR_HITS_BOTH)))
+    assert trade['entry_time'] == START + timedelta(minutes=1) and trade['exit_time'] == START + timedelta(minutes=2)
+    assert trade['outcome'] == 'WIN' and trade['pnl_pips'] == pytest.approx(20)
+
+
+def test_exit_on_fill_bar_assumes_the_stop():
+    trade, = _closed(ScriptedEngine({0: ('BUY', 1.10000)}, exit_on_fill_bar=True).run(_candles(FILL_BAR_HITS_BOTH)))
+    assert trade['exit_time'] == trade['entry_time'] == START + timedelta(minutes=1)
+    assert trade['outcome'] == 'LOSS' and trade['pnl_pips'] == pytest.approx(-10)
+
+
+def test_gap_through_the_stop_exits_at_the_open():
+    trade, = _closed(ScriptedEngine({0: ('BUY', 1.10000)}).run(_candles([
+        (1.10010, 1.10012, 1.10005, 1.10008),
+        (1.10005, 1.10006, 1.09998, 1.10001),
+        (1.09980, 1.09985, 1.09975, 1.09980),   # abre por debajo del stop 1.09990
+    ])))
+    assert trade['exit_price'] == 1.09980 and trade['pnl_pips'] == pytest.approx(-20)
+
+
+def test_report_pnl_hit_rate_and_drawdown():
+    # Gana 20, pierde 10, pierde 10, gana 20: drawdown máximo de 20 pips
+    rows, signals = [], {}
+    for outcome in ('WIN', 'LOSS', 'LOSS', 'WIN'):
+        signals[len(rows)] = ('BUY', 1.10000)
+        exit_bar = (1.10005, 1.10025, 1.10001, 1.10020) if outcome == 'WIN' else (1.09995, 1.09998, 1.09985, 1.09990)
+        rows += [(1.10010, 1.10012, 1.10005, 1.10008), (1.10002, 1.10004, 1.10000, 1.10002), exit_bar]
+    report = ScriptedEngine(signals).run(_candles(rows))
+    assert [t['outcome'] for t in _closed(report)] == ['WIN', 'LOSS', 'LOSS', 'WIN']
+    assert report['trades'] == 4 and report['wins'] == 2 and report['hit_rate'] == 50.0
+    assert report['total_pips'] == pytest.approx(20) and report['average_pips'] == pytest.approx(5)
+    assert report['max_drawdown_pips'] == pytest.approx(20)
+
+
+def test_unfilled_order_expires():
+    report = ScriptedEngine({0: ('BUY', 1.09000)}, order_expiry_bars=2).run(_candles([(1.1, 1.1001, 1.0999, 1.1)] * 5))
+    assert report['expired_orders'] == 1 and report['trades'] == 0
@@ -0,0 +1,34 @@
+import asyncio
+from datetime import timedelta
+import pandas as pd
+
+from api.config import TradingConfig
+from api.strategy import IntegratedSMCStrategy
+from benchmarks.synthetic import generate_ohlcv
+from tests.conftest import END
+
+
+def _stored_strategy(tmp_path, now):
+    strategy = IntegratedSMCStrategy(api_key=None, config=TradingConfig(candle_store_path=str(tmp_path)), clock=lambda tz=None: now)
+    strategy.candle_store.append('EURUSD', '1min', generate_ohlcv(100, 'trending', 1, end=END))
+    return strategy
+
+
+def test_store_refresh_uses_strategy_clock(tmp_path):
+    # Con el reloj en la última vela no hay nada nuevo que descargar; un minuto después sí
+    assert _stored_strategy(tmp_path, END)._store_refresh('EURUSD', '1min') == (False, pd.Timestamp(END))
+    assert _stored_strategy(tmp_path, END + timedelta(minutes=1))._store_refresh('EURUSD', '1min') == (True, pd.Timestamp(END))
+
+
+def test_async_store_path_downloads_only_the_delta(tmp_path):
+    strategy = _stored_strategy(tmp_path, END + timedelta(minutes=2))
+    calls = []
+
+    async def download(symbol, timeframe, since=None, limit=None):
+        calls.append(since)
+        return generate_ohlcv(3, 'trending', 2, end=END + timedelta(minutes=2))
+
+    strategy._download_market_data_async = download
+    df = asyncio.run(strategy.get_market_data_async('EURUSD', '1min', limit=50))
+    assert calls == [pd.Timestamp(END)]
+    assert len(df) == 50 and df['date'].iloc[-1] == pd.Timestamp(END + timedelta(minutes=2))
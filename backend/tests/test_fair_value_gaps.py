@@ -0,0 +1,20 @@
+from tests import legacy
+from tests.conftest import assert_records_equal
+
+
+def test_fair_value_gaps_match_legacy_loop(strategy, candles):
+    expected = legacy.detect_fair_value_gaps(strategy, candles)
+    assert expected, "la serie debe producir FVGs"
+    assert_records_equal(strategy.detect_fair_value_gaps(candles), expected)
+
+
+def test_fill_tracking_only_adds_is_filled(strategy, candles):
+    plain = strategy.detect_fair_value_gaps(candles)
+    tracked = strategy.detect_fair_value_gaps(candles, track_fill=True)
+    assert [{k: v for k, v in fvg.items() if k != 'is_filled'} for fvg in tracked] == plain
+    for fvg in tracked:
+        later = candles[candles['date'] > fvg['time']].iloc[1:]
+        if fvg['type'] == 'bullish':
+            assert fvg['is_filled'] == bool((later['high'] >= fvg['zone_max']).any())
+        else:
+            assert fvg['is_filled'] == bool((later['low'] <= fvg['zone_min']).any())
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from api.strategy import _cluster_labels
+from tests import legacy
+from tests.conftest import assert_records_equal, make_strategy
+
+
+def test_liquidity_levels_match_legacy_loop(strategy, candles):
+    swings = strategy.detect_swing_points_vectorized(candles)['all_swings']
+    expected = legacy.find_liquidity_levels(strategy, swings)
+    assert expected, "la serie debe producir niveles de liquidez"
+    assert_records_equal(strategy.find_liquidity_levels(swings), expected)
+
+
+@pytest.mark.parametrize('tolerance', [0.00005, 0.0005, 0.002, 0.01])
+def test_liquidity_levels_match_legacy_loop_across_tolerances(candles, tolerance):
+    strategy = make_strategy(candles, liquidity_tolerance=tolerance, max_freshness_minutes=10**9)
+    swings = strategy.detect_swing_points_vectorized(candles)['all_swings']
+    assert_records_equal(strategy.find_liquidity_levels(swings), legacy.find_liquidity_levels(strategy, swings))
+
+
+def test_cluster_labels_keep_first_matching_key():
+    # 1.125 está a menos de 0.25 de las claves 1.0 y 1.25 y se une a la primera creada; 1.5 está justo a 0.25
+    # de 1.25 y crea su propia clave; 1.375 coincide con 1.25 y con 1.5 y se queda con 1.25
+    labels = _cluster_labels(np.array([1.0, 1.25, 1.125, 1.5, 1.375]), 0.25)
+    assert labels.tolist() == [0, 1, 0, 2, 1]
+
+
+def test_liquidity_levels_empty(strategy):
+    assert strategy.find_liquidity_levels([]) == []
+    assert len(strategy.find_liquidity_level_arrays([])['price']) == 0
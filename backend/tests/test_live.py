@@ -0,0 +1,94 @@
+import asyncio
+import json
+from datetime import timedelta
+import pandas as pd
+
+from api.live import FakeCandleFeed, LiveHub, ProviderCandleFeed
+from benchmarks.synthetic import generate_ohlcv
+from tests.conftest import END, make_strategy
+
+
+def _encoder(result):
+    return json.dumps({'symbol': result['symbol'], 'current_price': float(result['current_price'])})
+
+
+async def _next(queue, timeout=2.0):
+    return json.loads(await asyncio.wait_for(queue.get(), timeout))
+
+
+def _hub(batch=1, history_bars=250):
+    df = generate_ohlcv(400, 'trending', 1, end=END)
+    feed = FakeCandleFeed(df, history_bars=history_bars, batch=batch)
+    return LiveHub(feed, _encoder, poll_interval=0.01), feed, make_strategy(df), df
+
+
+def test_subscribers_share_one_state_and_poll():
+    async def scenario():
+        hub, feed, strategy, df = _hub()
+        async with hub.subscribe('EURUSD', strategy) as first, hub.subscribe('EURUSD', strategy) as second:
+            assert hub.subscriber_count('EURUSD') == 2 and len(hub._channels) == 1
+            a, b = await _next(first), await _next(second)
+            assert a['symbol'] == 'EURUSD' and a['current_price'] == b['current_price']
+            # Un suscriptor tardío recibe el último estado publicado sin esperar a la siguiente consulta
+            async with hub.subscribe('EURUSD', strategy) as late:
+                assert late.qsize() == 1
+        await hub.close()
+    asyncio.run(scenario())
+
+
+def test_last_unsubscribe_stops_polling():
+    async def scenario():
+        hub, feed, strategy, df = _hub()
+        async with hub.subscribe('EURUSD', strategy) as updates:
+            await _next(updates)
+            task = hub._channels[('EURUSD', strategy.config.cache_key())].task
+        assert hub.subscriber_count('EURUSD') == 0 and not hub._channels
+        await asyncio.sleep(0.05)
+        assert task.cancelled()
+        polls = feed.polls
+        await asyncio.sleep(0.05)
+        assert feed.polls == polls
+    asyncio.run(scenario())
+
+
+def test_publishes_only_when_a_candle_closes():
+    async def scenario():
+        hub, feed, strategy, df = _hub(batch=0)
+        async with hub.subscribe('EURUSD', strategy) as updates:
+            first = await _next(updates)
+            assert first['current_price'] == df['close'].iloc[249]
+            # El feed no trae velas nuevas: se sigue consultando pero no se publica nada
+            await asyncio.sleep(0.1)
+            assert feed.polls > 3 and updates.empty()
+            feed.batch = 1
+            assert (await _next(updates))['current_price'] == df['close'].iloc[250]
+        await hub.close()
+    asyncio.run(scenario())
+
+
+def test_provider_feed_waits_for_the_next_close_and_fetches_the_delta():
+    df = generate_ohlcv(1000, 'trending', 1, end=END)
+    now = [END]
+    strategy = make_strategy(df)
+    strategy.clock = lambda tz=None: now[0]
+    requested = []
+
+    async def get_market_data_async(symbol, timeframe, limit):
+        requested.append(limit)
+        return df[df['date'] <= now[0]].tail(limit).reset_index(drop=True)
+
+    async def get_current_price_async(symbol):
+        return {'ask': 1.1}
+
+    strategy.get_market_data_async, strategy.get_current_price_async = get_market_data_async, get_current_price_async
+    feed = ProviderCandleFeed(history_bars=500)
+    since = pd.Timestamp(END - timedelta(minutes=1))
+
+    candles, _ = asyncio.run(feed.poll(strategy, 'EURUSD', None))
+    assert requested == [500] and candles['date'].iloc[-1] == since
+    # La vela de END sigue abierta hasta END + 1min: no se pide nada
+    now[0] = END + timedelta(seconds=50)
+    assert asyncio.run(feed.poll(strategy, 'EURUSD', since))[0].empty and requested == [500]
+    now[0] = END + timedelta(minutes=1, seconds=5)
+    candles, quote = asyncio.run(feed.poll(strategy, 'EURUSD', since))
+    assert requested == [500, 3] and candles['date'].iloc[-1] == pd.Timestamp(END) and quote == {'ask': 1.1}
@@ -0,0 +1,102 @@
+"""Búsqueda de parámetros: los resultados del pool coinciden con backtests secuenciales y la memoria compartida se libera."""
+from dataclasses import replace
+from multiprocessing import shared_memory
+import pandas as pd
+import pytest
+
+from api import optimizer
+from api.backtest import BacktestEngine
+from api.config import TradingConfig
+from api.optimizer import ParameterSweep, SharedCandles, grid
+from benchmarks.synthetic import generate_ohlcv
+from tests.conftest import END
+
+ENGINE_OPTIONS = {'window': 100, 'step': 5}
+SPACE = {'swing_period': [3, 5], 'min_confluence_score': [60.0, 80.0]}
+
+
+@pytest.fixture(scope='module')
+def series():
+    return {'trending': generate_ohlcv(400, 'trending', 1, end=END), 'gappy': generate_ohlcv(400, 'gappy', 2, end=END)}
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Nombres de los bloques de memoria compartida creados durante la prueba."""
+    names = []
+    add = SharedCandles.add
+
+    def recording_add(self, name, df):
+        candle_set = add(self, name, df)
+        names.append(candle_set.shm_name)
+        return candle_set
+
+    monkeypatch.setattr(SharedCandles, 'add', recording_add)
+    return names
+
+
+def sequential(config, df):
+    report = BacktestEngine(config, **ENGINE_OPTIONS).run(df)
+    report.pop('trade_log')
+    report.pop('elapsed_seconds')
+    return report
+
+
+def assert_unlinked(names):
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_grid():
+    assert grid(SPACE) == [{'swing_period': 3, 'min_confluence_score': 60.0}, {'swing_period': 3, 'min_confluence_score': 80.0},
+                           {'swing_period': 5, 'min_confluence_score': 60.0}, {'swing_period': 5, 'min_confluence_score': 80.0}]
+
+
+def test_shared_candles_round_trip(series):
+    with SharedCandles() as shared:
+        candle_set = shared.add('trending', series['trending'])
+        attached = optimizer._attach(candle_set)
+        pd.testing.assert_frame_equal(attached, series['trending'][list(optimizer.CANDLE_COLUMNS)], check_dtype=False)
+        block, _ = optimizer._attached.pop(candle_set.shm_name)
+        block.close()
+    assert_unlinked([candle_set.shm_name])
+
+
+def test_sweep_matches_sequential_backtests(series, published):
+    ranking = ParameterSweep(max_workers=2, engine_options=ENGINE_OPTIONS).run(series, grid(SPACE))
+    assert len(ranking) == 4 and len(published) == len(series)
+    for entry in ranking:
+        config = replace(TradingConfig(), **entry['params'])
+        expected = {name: sequential(config, df) for name, df in series.items()}
+        for name, metrics in entry['per_candles'].items():
+            metrics.pop('elapsed_seconds')
+            assert metrics == expected[name], (entry['params'], name)
+        assert entry['trades'] == sum(m['trades'] for m in expected.values())
+        assert entry['total_pips'] == pytest.approx(sum(m['total_pips'] for m in expected.values()))
+    assert [entry['total_pips'] for entry in ranking] == sorted((entry['total_pips'] for entry in ranking), reverse=True)
+    assert_unlinked(published)
+
+
+def test_resumed_sweep_skips_finished_backtests(series, published, tmp_path, monkeypatch):
+    results = tmp_path / 'sweep.jsonl'
+    sweep = ParameterSweep(results_path=str(results), max_workers=2, engine_options=ENGINE_OPTIONS)
+    first = sweep.run(series, grid(SPACE)[:2])
+    assert len(results.read_text().splitlines()) == 2 * len(series)
+
+    def fail(*args):
+        raise AssertionError('backtest repetido')
+
+    # Ampliada: solo se calculan las combinaciones nuevas; repetida: no se calcula nada
+    sweep.run(series, grid(SPACE))
+    assert len(results.read_text().splitlines()) == 4 * len(series)
+    monkeypatch.setattr(ParameterSweep, '_run_pending', fail)
+    again = sweep.run(series, grid(SPACE)[:2])
+    assert [entry['params'] for entry in again] == [entry['params'] for entry in first]
+    assert_unlinked(published)
+
+
+def test_unknown_parameters_are_rejected(series, published):
+    with pytest.raises(ValueError, match='preferred_pairs'):
+        ParameterSweep().run(series, [{'preferred_pairs': 3}])
+    assert published == []
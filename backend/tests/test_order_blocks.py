@@ -0,0 +1,13 @@
+from tests import legacy
+from tests.conftest import assert_records_equal
+
+
+def test_order_blocks_match_legacy_loop(strategy, candles):
+    expected = legacy.detect_order_blocks(strategy, candles)
+    assert expected, "la serie debe producir order blocks"
+    assert_records_equal(strategy.detect_order_blocks(candles), expected)
+
+
+def test_order_blocks_short_frame(strategy, candles):
+    assert strategy.detect_order_blocks(candles.head(2)) == []
+    assert len(strategy.detect_order_block_arrays(candles.head(2))['index']) == 0
@@ -0,0 +1,34 @@
+"""Grafo del análisis: etapas medidas y selección de campos."""
+from contextlib import contextmanager
+from collections import Counter
+
+from api import pipeline
+from api.pipeline import NODES, OUTPUT_FIELDS
+from api.resample import resample_ohlcv
+
+
+def snapshot(df):
+    return {'frames': {'1min': df, '15min': resample_ohlcv(df, 15)},
+            'current_data': {'ticker': 'EURUSD', 'ask': float(df['close'].iloc[-1])}}
+
+
+def test_stage_names_are_unique():
+    stages = [stage for _, stage, _ in NODES.values() if stage is not None]
+    assert len(stages) == len(set(stages))
+
+
+def test_each_stage_is_timed_once_per_analysis(monkeypatch, strategy, candles):
+    entered = Counter()
+    timed_stage = pipeline.timed_stage
+
+    @contextmanager
+    def counting_stage(name):
+        entered[name] += 1
+        with timed_stage(name):
+            yield
+
+    monkeypatch.setattr(pipeline, 'timed_stage', counting_stage)
+    result = strategy.analyze_snapshot('EURUSD', snapshot(candles))
+    assert tuple(result) == OUTPUT_FIELDS
+    assert set(entered) == {stage for _, stage, _ in NODES.values() if stage is not None}
+    assert set(entered.values()) == {1}
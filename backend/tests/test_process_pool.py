@@ -0,0 +1,23 @@
+"""Tamaño del pool de procesos de cada worker de uvicorn."""
+import os
+import pytest
+
+os.environ.setdefault("SHARED_CACHE_URL", "none")
+
+import main
+
+
+@pytest.mark.parametrize('env, expected', [
+    ({}, 8),
+    ({'WEB_CONCURRENCY': '4'}, 2),
+    ({'WEB_CONCURRENCY': '16'}, 1),
+    ({'WEB_CONCURRENCY': '4', 'PROCESS_POOL_SIZE': '3'}, 3),
+    ({'PROCESS_POOL_SIZE': '0'}, 8),
+])
+def test_process_pool_size(monkeypatch, env, expected):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    for name in ('WEB_CONCURRENCY', 'PROCESS_POOL_SIZE'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert main.process_pool_size() == expected
@@ -0,0 +1,44 @@
+import asyncio
+import httpx
+import pytest
+
+from api.strategy import IntegratedSMCStrategy
+
+
+def _strategy(handler=None):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler)) if handler else None
+    return IntegratedSMCStrategy(api_key=None, http_client=client)
+
+
+@pytest.mark.parametrize('response', [httpx.Response(200, content=b'<html>mantenimiento</html>'),
+                                      httpx.Response(503, json={'Error Message': 'no disponible'})])
+def test_async_quote_errors_return_empty(response):
+    assert asyncio.run(_strategy(lambda request: response).get_current_price_async('EURUSD')) == {}
+
+
+def test_async_quote_parses_first_row():
+    quote = [{'ticker': 'EURUSD', 'bid': 1.1, 'ask': 1.10002}]
+    strategy = _strategy(lambda request: httpx.Response(200, json=quote))
+    assert asyncio.run(strategy.get_current_price_async('EURUSD')) == quote[0]
+
+
+def test_async_client_is_created_when_missing_or_closed():
+    strategy = _strategy()
+    client = strategy._async_client()
+    assert isinstance(client, httpx.AsyncClient) and strategy._async_client() is client
+    asyncio.run(client.aclose())
+    assert strategy._async_client() is not client
+
+
+def test_api_key_is_sent_as_param_and_redacted_from_errors(caplog):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(503, json={'Error Message': 'no disponible'})
+
+    strategy = IntegratedSMCStrategy(api_key='clave-secreta', http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    assert asyncio.run(strategy.get_current_price_async('EURUSD')) == {}
+    assert asyncio.run(strategy._download_market_data_async('EURUSD', '1min')).empty
+    assert [request.url.params['apikey'] for request in requests_seen] == ['clave-secreta'] * 2
+    assert caplog.records and 'clave-secreta' not in caplog.text
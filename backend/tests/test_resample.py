@@ -0,0 +1,75 @@
+"""El resampler incremental produce las mismas velas que resample_ohlcv sobre la serie completa."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.resample import IncrementalResampler, resample_ohlcv
+
+
+def assert_frames_equal(actual, expected):
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+
+def chunks(df, sizes):
+    start, i = 0, 0
+    while start < len(df):
+        size = sizes[i % len(sizes)]
+        yield df.iloc[start:start + size]
+        start, i = start + size, i + 1
+
+
+def test_resample_matches_pandas(candles):
+    expected = (candles.set_index('date').resample('15min')
+                .agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+                .dropna(subset=['open']).reset_index())
+    assert_frames_equal(resample_ohlcv(candles, 15), expected)
+
+
+@pytest.mark.parametrize('sizes', [(1,), (7,), (15,), (3, 29, 1, 60)], ids=lambda s: 'x'.join(map(str, s)))
+@pytest.mark.parametrize('minutes', [5, 15])
+def test_incremental_matches_full_resample(candles, sizes, minutes):
+    candles = candles.iloc[:120]
+    resampler = IncrementalResampler(minutes)
+    seen = 0
+    for chunk in chunks(candles, sizes):
+        bars = resampler.update(chunk)
+        seen += len(chunk)
+        # Tras cada lote, incluido el último bucket aún incompleto
+        assert_frames_equal(bars, resample_ohlcv(candles.iloc[:seen], minutes))
+    assert seen == len(candles)
+
+
+def test_partial_last_bucket_is_completed(candles):
+    resampler = IncrementalResampler(15)
+    # Cortar a mitad de un bucket de 15min
+    cut = next(i for i, date in enumerate(candles['date']) if date.minute % 15 == 7 and i > 100)
+    partial = resampler.update(candles.iloc[:cut]).iloc[-1]
+    assert partial['date'].minute % 15 == 0
+    assert partial['close'] == candles['close'].iloc[cut - 1]
+    assert_frames_equal(resampler.update(candles.iloc[cut:]), resample_ohlcv(candles, 15))
+
+
+def test_repeated_candles_replace_previous(candles):
+    # El proveedor puede devolver otra vez la última vela (p. ej. aún abierta) con otros valores
+    resampler = IncrementalResampler(15)
+    resampler.update(candles.iloc[:100])
+    revised = candles.iloc[95:200].copy()
+    revised.loc[revised.index[:5], 'high'] += 0.01
+    bars = resampler.update(revised)
+    expected = pd.concat([candles.iloc[:95], revised], ignore_index=True)
+    assert_frames_equal(bars, resample_ohlcv(expected, 15))
+
+
+def test_empty_updates_keep_bars(candles):
+    resampler = IncrementalResampler(15)
+    bars = resampler.update(candles.iloc[:50])
+    assert resampler.update(candles.iloc[:0]) is bars
+    assert resampler.update(candles.iloc[:10]) is bars
+
+
+def test_max_bars_keeps_the_latest(candles):
+    resampler = IncrementalResampler(15, max_bars=10)
+    for chunk in chunks(candles, (37,)):
+        bars = resampler.update(chunk)
+        assert len(bars) <= 10
+    assert_frames_equal(bars, resample_ohlcv(candles, 15).tail(10))
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+import httpx
+import pytest
+
+from api.rate_limit import RateLimiter, SharedRateLimiter, create_rate_limiter
+from api.scanner import MarketScanner, ScanStore
+from api.shared_cache import MemoryCache, SQLiteCache
+from api.strategy import IntegratedSMCStrategy
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def shared(request, tmp_path):
+    return MemoryCache() if request.param == 'memory' else SQLiteCache(os.path.join(tmp_path, 'cache.sqlite3'))
+
+
+def _entry(symbol, confidence):
+    return {'symbol': symbol, 'best_confidence': confidence}
+
+
+def test_local_limiter_allows_burst_then_waits():
+    limiter = RateLimiter(60, burst=2)
+    assert [limiter.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_shared_limiter_is_common_to_all_workers(shared):
+    # Dos limitadores sobre la misma caché equivalen a dos workers: 60/min en ventanas de 10 s = 10 por ventana
+    workers = [SharedRateLimiter(shared, 60), SharedRateLimiter(shared, 60)]
+    starts = []
+    for i in range(25):
+        now = time.time()
+        starts.append(now + workers[i % 2].reserve())
+    windows = [int(start / 10 + 1e-6) for start in starts]
+    assert windows == sorted(windows)
+    assert max(windows.count(window) for window in set(windows)) <= 10
+    assert windows[-1] - windows[0] >= 2
+
+
+def test_create_rate_limiter():
+    assert create_rate_limiter(0) is None
+    assert type(create_rate_limiter(300)) is RateLimiter
+    assert isinstance(create_rate_limiter(300, MemoryCache()), SharedRateLimiter)
+
+
+def test_only_one_worker_claims_each_cycle(shared):
+    strategy = IntegratedSMCStrategy(api_key=None)
+    scanners = [MarketScanner(strategy, ScanStore(), ['EURUSD'], shared_cache=shared) for _ in range(3)]
+    now = 1_800_000_000.0
+    claims = [asyncio.run(scanner.claim_cycle(now + 5)) for scanner in scanners]
+    assert claims == [True, False, False]
+    assert asyncio.run(scanners[1].claim_cycle(now + 65))
+    assert asyncio.run(MarketScanner(strategy, ScanStore(), ['EURUSD']).claim_cycle(now + 5))
+
+
+def test_ranking_is_published_to_every_worker(shared):
+    scanning, serving = ScanStore(shared), ScanStore(shared)
+    scanning.update([_entry('EURUSD', 70), _entry('GBPUSD', 90)])
+    assert [e['symbol'] for e in serving.snapshot()['ranking']] == ['GBPUSD', 'EURUSD']
+    # Otro worker escanea la vela siguiente y parte de las entradas publicadas
+    serving.update([_entry('EURUSD', 95)])
+    snapshot = scanning.snapshot(limit=1)
+    assert snapshot['symbols'] == 2 and snapshot['ranking'] == [_entry('EURUSD', 95)]
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(60)
+        self.calls = 0
+
+    def reserve(self, tokens: float = 1) -> float:
+        self.calls += 1
+        return 0.0
+
+
+def test_provider_calls_go_through_the_limiter():
+    limiter = CountingLimiter()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+    strategy = IntegratedSMCStrategy(api_key=None, http_client=client, rate_limiter=limiter)
+    asyncio.run(strategy.fetch_market_snapshot_async('EURUSD'))
+    # Una descarga por timeframe pedido al proveedor más el precio
+    assert limiter.calls == len(strategy._fetch_plan()) + 1
@@ -0,0 +1,77 @@
+import itertools
+import random
+import numpy as np
+import pytest
+
+from api import scoring
+from api.models import KillZoneInfo, PremiumDiscountZones
+from benchmarks.synthetic import generate_ohlcv
+from tests import legacy
+from tests.conftest import SEEDS, make_strategy
+
+KILL_ZONES = [None, KillZoneInfo(None, 'low', 30, False), KillZoneInfo('London', 'high', 45, True),
+              KillZoneInfo('Asia', 'medium', 10, True), KillZoneInfo('Otra', 'low', 5, True)]
+PD_ZONES = [None, PremiumDiscountZones(None, None, None, None, None, 'UNKNOWN'),
+            PremiumDiscountZones(1.1000, 1.1050, 1.0950, 1.1100, 1.0900, 'EQUILIBRIUM')]
+PRICES = [1.0900, 1.0950, 1.1000, 1.1050, 1.1200, None]
+CONTEXTS = [{key: value for key, value in (('kill_zone', kill_zone), ('premium_discount_zones', pd_zones),
+                                           ('current_price', price)) if value is not None}
+            for kill_zone, pd_zones, price in itertools.product(KILL_ZONES, PD_ZONES, PRICES)]
+
+
+def _random_levels(seed: int, count: int = 300):
+    """Niveles con valores en los bordes de los escalones y claves ausentes (se aplican los valores por defecto)."""
+    rng = random.Random(seed)
+    candidates = {
+        'type': ['bullish', 'bearish', 'low', 'high'],
+        'source': ['Order Block', 'Fair Value Gap', 'Liquidity'],
+        'touches_count': [0, 1, 2, 3, 7],
+        'freshness': [0.0, 14.9, 15, 15.1, 30, 45.5, 60, 60.01, 500, 999],
+        'strength': [0, 39.9, 40, 59, 60, 79.99, 80, 100],
+        'is_swept': [False, True],
+    }
+    return [{key: rng.choice(values) for key, values in candidates.items() if rng.random() < 0.85} for _ in range(count)]
+
+
+def _columns(levels):
+    return {
+        'type': np.array([scoring.TYPE_CODES.get(level.get('type'), scoring.UNKNOWN_CODE) for level in levels]),
+        'source': np.array([scoring.SOURCE_CODES.get(level.get('source'), scoring.UNKNOWN_CODE) for level in levels]),
+        'touches': [level.get('touches_count', 1) for level in levels],
+        'freshness': [level.get('freshness', 999) for level in levels],
+        'strength': [level.get('strength', 0) for level in levels],
+        'is_swept': [level.get('is_swept', False) for level in levels],
+    }
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_single_level_score_matches_legacy(seed):
+    strategy = make_strategy(generate_ohlcv(50, 'trending', seed))
+    levels = _random_levels(seed)
+    for context in CONTEXTS:
+        assert [strategy.calculate_confluence_score(level, context) for level in levels] == \
+               [legacy.calculate_confluence_score(level, context) for level in levels]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_batch_scores_match_legacy(seed):
+    scorer = scoring.ConfluenceScorer()
+    levels = _random_levels(seed)
+    columns = _columns(levels)
+    for context in CONTEXTS:
+        assert scorer.score(columns, context).tolist() == [legacy.calculate_confluence_score(level, context) for level in levels]
+
+
+def test_zone_scores_match_legacy(strategy, candles):
+    swings = strategy.detect_swing_points_vectorized(candles)
+    liquidity = strategy.find_liquidity_level_arrays(swings['all_swings'])
+    sweeps = strategy.detect_liquidity_sweep_arrays(candles, liquidity['price'], liquidity['is_high'])
+    zone_array = strategy.collect_zones(candles, strategy.detect_order_block_arrays(candles),
+                                        strategy.detect_fair_value_gap_arrays(candles), liquidity, sweeps)
+    records = zone_array.to_records()
+    pd_zones = strategy.calculate_premium_discount_zones(swings)
+    for kill_zone in KILL_ZONES[1:]:
+        for price in (pd_zones.range_low, pd_zones.equilibrium, pd_zones.range_high, candles['close'].iloc[-1]):
+            context = {'kill_zone': kill_zone, 'premium_discount_zones': pd_zones, 'current_price': price}
+            assert strategy.scorer.score_zones(zone_array, context).tolist() == \
+                   [legacy.calculate_confluence_score(record, context) for record in records]
@@ -0,0 +1,42 @@
+import copy
+import pytest
+
+from tests import legacy
+from tests.conftest import assert_records_equal, make_strategy
+
+
+def _window_levels(candles):
+    """Niveles de ambos tipos en los cierres de las últimas 30 velas: siempre hay sweeps dentro de la ventana."""
+    closes = candles['close'].iloc[-30:]
+    return [{'price': price, 'type': level_type, 'is_swept': False} for price in closes for level_type in ('low', 'high')]
+
+
+def _assert_sweeps_match(strategy, candles, levels):
+    expected_levels, actual_levels = copy.deepcopy(levels), copy.deepcopy(levels)
+    expected = legacy.detect_liquidity_sweeps(strategy, candles, expected_levels)
+    assert_records_equal(strategy.detect_liquidity_sweeps(candles, actual_levels), expected)
+    assert [level['is_swept'] for level in actual_levels] == [level['is_swept'] for level in expected_levels]
+    return expected
+
+
+def test_sweeps_match_legacy_loop_on_liquidity_levels(strategy, candles):
+    swings = strategy.detect_swing_points_vectorized(candles)['all_swings']
+    _assert_sweeps_match(strategy, candles, legacy.find_liquidity_levels(strategy, swings))
+
+
+def test_sweeps_match_legacy_loop_on_window_levels(strategy, candles):
+    assert _assert_sweeps_match(strategy, candles, _window_levels(candles)), "los niveles deben producir sweeps"
+
+
+@pytest.mark.parametrize('offset', range(1, 26))
+def test_sweeps_window_edge_matches_legacy_loop(offset, candles):
+    # Niveles que solo la vela `offset` desde el final puede barrer: la ventana acaba donde acababa el bucle
+    strategy = make_strategy(candles)
+    candle = candles.iloc[-offset]
+    levels = [{'price': candle['low'] + 1e-9, 'type': 'low', 'is_swept': False},
+              {'price': candle['high'] - 1e-9, 'type': 'high', 'is_swept': False}]
+    _assert_sweeps_match(strategy, candles, levels)
+
+
+def test_sweeps_short_frame(strategy, candles):
+    assert strategy.detect_liquidity_sweeps(candles.head(1), _window_levels(candles)) == []
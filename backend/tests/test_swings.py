@@ -0,0 +1,70 @@
+"""El detector de swings incremental confirma los mismos swings que detect_swing_points_vectorized."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.conftest import END, assert_records_equal, make_strategy
+from benchmarks.synthetic import generate_ohlcv
+
+
+def stream(detector, df):
+    """Alimenta el detector vela a vela, como el estado en vivo."""
+    confirmed = []
+    for high, low, time in zip(df['high'].values, df['low'].values, df['date'].values):
+        confirmed.extend(detector.update(high, low, time))
+    return confirmed
+
+
+def assert_same_swings(detector, expected):
+    swings = detector.swings()
+    for key in ('swing_highs', 'swing_lows', 'all_swings'):
+        assert_records_equal(swings[key], expected[key])
+
+
+@pytest.mark.parametrize('period', [1, 3, 5])
+def test_streaming_matches_vectorized(strategy, candles, period):
+    detector = strategy.create_swing_detector(period)
+    confirmed = stream(detector, candles)
+    expected = strategy.detect_swing_points_vectorized(candles, period)
+    assert_same_swings(detector, expected)
+    assert_records_equal(confirmed, expected['all_swings'])
+
+
+def test_every_prefix_matches(candles):
+    # Tras cada vela, los swings confirmados son los del vectorizado sobre las velas vistas
+    strategy = make_strategy(candles)
+    detector = strategy.create_swing_detector()
+    for end in range(1, 120):
+        detector.update(candles['high'].values[end - 1], candles['low'].values[end - 1], candles['date'].values[end - 1])
+        assert_same_swings(detector, strategy.detect_swing_points_vectorized(candles.iloc[:end]))
+
+
+def test_ties_and_gaps_match_vectorized():
+    df = generate_ohlcv(300, 'ranging', 7, end=END)
+    # Máximos y mínimos repetidos (mesetas) y huecos de datos
+    df['high'] = df['high'].round(3)
+    df['low'] = df['low'].round(3)
+    df.loc[[40, 41, 150], 'high'] = np.nan
+    df.loc[[90, 200], 'low'] = np.nan
+    strategy = make_strategy(df)
+    detector = strategy.create_swing_detector()
+    stream(detector, df)
+    assert_same_swings(detector, strategy.detect_swing_points_vectorized(df))
+
+
+def test_short_series_has_no_swings():
+    df = generate_ohlcv(10, 'trending', 1, end=END)
+    strategy = make_strategy(df)
+    detector = strategy.create_swing_detector(5)
+    assert stream(detector, df) == []
+    assert strategy.detect_swing_points_vectorized(df, 5) == detector.swings()
+
+
+def test_max_swings_keeps_the_latest(candles):
+    strategy = make_strategy(candles)
+    bounded = strategy.create_swing_detector(max_swings=5)
+    stream(bounded, candles)
+    expected = strategy.detect_swing_points_vectorized(candles)
+    for key in ('swing_highs', 'swing_lows', 'all_swings'):
+        assert 0 < len(bounded.swings()[key]) <= 10
+        assert_records_equal(bounded.swings()[key], expected[key][-len(bounded.swings()[key]):])